@@ -7,19 +7,52 @@ from flask import (
     url_for,
     session,
     flash,
+    g,
+    make_response,
 )
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+import orjson
 import os
 import secrets
+import hashlib
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime
-from sqlalchemy import text
+from functools import wraps
+from sqlalchemy import case, event, exists, func, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
 from werkzeug.security import generate_password_hash, check_password_hash
 import smtplib
 from email.message import EmailMessage
 
 from extensions import db
 
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialize responses (jsonify and all /api/* routes) with orjson.
+
+    Keys stay sorted and output compact, as with Flask's default provider;
+    anything orjson can't handle natively falls back to Flask's encoder.
+    """
+
+    _options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=self._options).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self._options) + b"\n",
+            mimetype=self.mimetype,
+        )
+
+
 app = Flask(__name__, template_folder="templates")
+app.json = OrjsonProvider(app)
 CORS(
     app,
     supports_credentials=True,
@@ -33,37 +66,106 @@ app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + os.path.join(
     basedir, "teamrank.db"
 )
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Worker threads for the production server (see __main__). Keep the pool
+# larger than that so requests don't queue waiting for a connection.
+WSGI_THREADS = 8
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "pool_size": 10,
+    "max_overflow": 20,
+    # seconds a connection waits on a locked database before erroring
+    "connect_args": {"timeout": 30},
+}
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY") or secrets.token_hex(16)
+app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
+# scrypt with N=2**14 costs ~45 ms per hash on a laptop CPU (Werkzeug's default
+# N=2**15 is ~95 ms). Existing hashes keep verifying since the parameters are
+# stored alongside each hash.
+app.config["PASSWORD_HASH_METHOD"] = (
+    os.environ.get("PASSWORD_HASH_METHOD") or "scrypt:16384:8:1"
+)
 
 db.init_app(app)
 
-with app.app_context():
-    # import models so tables are registered
-    from models import User, Lobby, Team, Submission, Rating, JoinRequest
+# import models at module scope so tables are registered and views can use them
+from models import (
+    User,
+    Lobby,
+    Team,
+    TeamMember,
+    Submission,
+    Rating,
+    Invitation,
+    JoinRequest,
+    UserReputation,
+    Meta,
+    DATA_VERSION_KEY,
+    _normalize_0_to_10,
+)
+
+def _sqlite_on_connect(dbapi_connection, connection_record):
+    # Pooled connections stay open across requests, so per-connection
+    # settings are applied once here rather than per request.
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a rating/submission commit is in flight,
+    # and NORMAL sync only fsyncs at checkpoints instead of every commit.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
 
+with app.app_context():
+    event.listen(db.engine, "connect", _sqlite_on_connect)
     db.create_all()
 
 
-def _sqlite_column_exists(table_name: str, column_name: str) -> bool:
+def _sqlite_table_columns(table_name: str) -> set[str]:
     rows = db.session.execute(text(f"PRAGMA table_info({table_name})")).all()
-    return any(r[1] == column_name for r in rows)
+    return {r[1] for r in rows}
 
 
 def _sqlite_add_column_if_missing(
-    table_name: str, column_name: str, column_def_sql: str
+    columns_by_table: dict[str, set[str]],
+    table_name: str,
+    column_name: str,
+    column_def_sql: str,
 ) -> None:
-    if _sqlite_column_exists(table_name, column_name):
+    columns = columns_by_table.get(table_name)
+    if columns is None:
+        columns = columns_by_table[table_name] = _sqlite_table_columns(table_name)
+    if column_name in columns:
         return
     db.session.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_def_sql}"))
     db.session.commit()
+    columns.add(column_name)
 
 
 with app.app_context():
-    # Minimal schema evolution for SQLite (no migration tool in this demo)
-    _sqlite_add_column_if_missing("lobby", "finished", "finished BOOLEAN DEFAULT 0")
-    _sqlite_add_column_if_missing("lobby", "finished_at", "finished_at DATETIME")
-    _sqlite_add_column_if_missing("submission", "submitter_id", "submitter_id INTEGER")
-    _sqlite_add_column_if_missing("user", "password_hash", "password_hash TEXT")
+    # Minimal schema evolution for SQLite (no migration tool in this demo).
+    # Each table's columns are read once and probed in memory.
+    schema: dict[str, set[str]] = {}
+    _sqlite_add_column_if_missing(schema, "lobby", "finished", "finished BOOLEAN DEFAULT 0")
+    _sqlite_add_column_if_missing(schema, "lobby", "finished_at", "finished_at DATETIME")
+    _sqlite_add_column_if_missing(schema, "submission", "submitter_id", "submitter_id INTEGER")
+    _sqlite_add_column_if_missing(schema, "user", "password_hash", "password_hash TEXT")
+
+    # create_all() only builds indexes along with new tables; add any that an
+    # older database is missing. A unique index over rows an older database
+    # duplicates is skipped until tools/migrate_unique_indexes.py removes them;
+    # until then Rating.upsert falls back to an update-or-insert.
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(db.engine, checkfirst=True)
+            except IntegrityError:
+                app.logger.warning(
+                    "Skipped unique index %s: %s has duplicate rows; "
+                    "run tools/migrate_unique_indexes.py",
+                    index.name,
+                    table.name,
+                )
 
 
 with app.app_context():
@@ -74,15 +176,23 @@ with app.app_context():
             from seed_db import seed_users
 
             seed_users()
+            db.session.commit()
 
 
 def get_current_user():
-    from models import User
-
+    if not session:
+        # anonymous visitor without a session cookie
+        return None
     user_id = session.get("user_id")
     if not user_id:
         return None
-    return User.query.get(user_id)
+    # Views and the template context processor both ask for the current user;
+    # load it once per request and keep it on `g`.
+    user = g.get("current_user")
+    if user is None or user.id != user_id:
+        user = db.session.get(User, user_id)
+        g.current_user = user
+    return user
 
 
 def _rep_overall_score_0_to_10(rep: dict | None) -> float:
@@ -96,8 +206,6 @@ def _rep_overall_score_0_to_10(rep: dict | None) -> float:
     if not rep:
         return 0.0
 
-    from models import _normalize_0_to_10
-
     contrib = _normalize_0_to_10(rep.get("contribution_avg"))
     comm = _normalize_0_to_10(rep.get("communication_avg"))
 
@@ -124,22 +232,216 @@ def _aggregate_team_rep_0_to_10(member_ids: list[int], rep_score_by_id: dict[int
     return round(sum(scores) / float(len(scores)), 2)
 
 
+# Rating writes only recompute their targets' roll-up rows (see models' commit
+# hooks); trust is global, so it and every row are rebuilt here instead, at
+# most once per interval and only when something changed.
+REPUTATION_REFRESH_SECONDS = float(os.environ.get("REPUTATION_REFRESH_SECONDS") or 60)
+
+
+def _refresh_stale_reputation() -> bool:
+    with app.app_context():
+        if not UserReputation.is_stale():
+            return False
+        UserReputation.refresh_all()
+        db.session.commit()
+        return True
+
+
+def _reputation_refresher():
+    while True:
+        try:
+            _refresh_stale_reputation()
+        except Exception:
+            app.logger.exception("Reputation refresh failed")
+        time.sleep(REPUTATION_REFRESH_SECONDS)
+
+
+# An upgraded database starts with an empty roll-up, and one written by
+# another process may be stale; rebuild it before serving anything.
+if os.environ.get("TRS_DISABLE_AUTOSEED") != "1":
+    _refresh_stale_reputation()
+
+_refresher_lock = threading.Lock()
+_refresher_started = False
+
+
+@app.before_request
+def _start_reputation_refresher():
+    # Started by the first request, so it runs under any server (python
+    # app.py, flask run, waitress-serve) but not for CLI commands or tools.
+    global _refresher_started
+    if _refresher_started or os.environ.get("TRS_DISABLE_AUTOSEED") == "1":
+        return
+    with _refresher_lock:
+        if _refresher_started:
+            return
+        _refresher_started = True
+    threading.Thread(
+        target=_reputation_refresher, name="reputation-refresher", daemon=True
+    ).start()
+
+
+@app.cli.command("refresh-reputation")
+def refresh_reputation_command():
+    """Recompute trust and the reputation roll-up for every user."""
+    UserReputation.refresh_all()
+    db.session.commit()
+    print("Reputation roll-up refreshed.")
+
+
 def _compute_rep_scores_for_user_ids(user_ids: set[int]) -> dict[int, float]:
-    """Compute scalar rep scores for a set of user ids (best effort)."""
+    """Scalar rep scores for a set of user ids, from the reputation roll-up."""
 
-    if not user_ids:
-        return {}
+    return {
+        user_id: _rep_overall_score_0_to_10(row.to_dict())
+        for user_id, row in UserReputation.for_user_ids(user_ids).items()
+    }
+
+
+def _lobby_listing(viewer) -> list[dict]:
+    """Lobby dicts for the /lobbies page and GET /api/lobbies.
+
+    Newest-first; for a logged-in viewer, joinable lobbies come first, ordered
+    by how close the team's reputation is to the viewer's.
+    """
+
+    # lobbies inserted in one batch can share a timestamp; id breaks the tie
+    qs = Lobby.query.order_by(Lobby.created_at.desc(), Lobby.id.desc()).all()
+    lobbies = []
 
-    from models import User
+    pending_by_lobby_id = {}
+    if viewer:
+        pending = JoinRequest.query.filter_by(
+            requester_id=viewer.id, status="pending"
+        ).all()
+        pending_by_lobby_id = {r.lobby_id: r for r in pending}
+
+    # Pre-compute rep scores for users participating in these lobbies (+ viewer).
+    member_ids_by_lobby_id: dict[int, list[int]] = {}
+    all_user_ids: set[int] = set()
 
-    trust_scores = User.compute_transitive_trust_scores()
-    users = User.query.filter(User.id.in_(user_ids)).all()
-    rep_score_by_id: dict[int, float] = {}
-    for u in users:
-        rep_score_by_id[u.id] = _rep_overall_score_0_to_10(
-            u.reputation(trust_scores=trust_scores)
+    # One query for the lobbies' teams and one for their members, instead of
+    # a team lookup plus a members load per lobby.
+    team_by_lobby_id: dict[int, Team] = {}
+    if qs:
+        teams = (
+            Team.query.filter(Team.lobby_id.in_([q.id for q in qs]))
+            .order_by(Team.id.asc())
+            .all()
+        )
+        for t in teams:
+            team_by_lobby_id.setdefault(t.lobby_id, t)
+
+    member_ids_by_team_id: dict[int, list[int]] = defaultdict(list)
+    if team_by_lobby_id:
+        rows = (
+            db.session.query(TeamMember.team_id, TeamMember.user_id)
+            .filter(TeamMember.team_id.in_([t.id for t in team_by_lobby_id.values()]))
+            .order_by(TeamMember.id.asc())
+            .all()
         )
-    return rep_score_by_id
+        for team_id, user_id in rows:
+            member_ids_by_team_id[team_id].append(user_id)
+
+    for q in qs:
+        team = team_by_lobby_id.get(q.id)
+        member_ids = member_ids_by_team_id.get(team.id, []) if team else []
+        member_ids_by_lobby_id[q.id] = member_ids
+        all_user_ids.update(member_ids)
+
+    if viewer:
+        all_user_ids.add(viewer.id)
+
+    rep_score_by_id = _compute_rep_scores_for_user_ids(all_user_ids)
+    viewer_rep = float(rep_score_by_id.get(viewer.id, 0.0)) if viewer else None
+
+    for idx, q in enumerate(qs):
+        team = team_by_lobby_id.get(q.id)
+        member_ids = member_ids_by_lobby_id.get(q.id, [])
+        participant_count = len(member_ids)
+        d = q.to_dict()
+        d["participant_count"] = participant_count
+        d["team_locked"] = bool(team.locked) if team else False
+
+        role = None
+        if viewer:
+            if q.leader_id and viewer.id == q.leader_id:
+                role = "Leader"
+            elif viewer.id in member_ids:
+                role = "Member"
+        d["role"] = role
+
+        req = pending_by_lobby_id.get(q.id)
+        d["join_request_status"] = req.status if req else None
+
+        team_rep = _aggregate_team_rep_0_to_10(member_ids, rep_score_by_id)
+        d["team_reputation"] = team_rep
+        if viewer_rep is not None:
+            d["rep_distance"] = round(abs(team_rep - viewer_rep), 2)
+        else:
+            d["rep_distance"] = None
+
+        # preserve original ordering (created_at desc) as a stable tiebreaker
+        d["_order"] = idx
+        lobbies.append(d)
+
+    if viewer:
+        lobbies.sort(key=_lobby_sort_key)
+
+    for l in lobbies:
+        l.pop("_order", None)
+
+    return lobbies
+
+
+def _lobby_is_joinable(l: dict) -> bool:
+    return (
+        l.get("role") is None
+        and (not bool(l.get("finished")))
+        and (not bool(l.get("team_locked")))
+    )
+
+
+def _lobby_sort_key(l: dict):
+    joinable_bucket = 0 if _lobby_is_joinable(l) else 1
+    dist = l.get("rep_distance")
+    dist_val = float(dist) if dist is not None else 1e9
+    return (joinable_bucket, dist_val, l.get("_order", 0))
+
+
+def _invite_recommendations(viewer, team, limit: int = 5) -> list[dict]:
+    """Users whose reputation is closest to the viewer's, for team invites.
+
+    Excludes current team members, the viewer and users with a pending invite.
+    """
+
+    pending_invites = Invitation.query.filter_by(team_id=team.id, status="pending").all()
+    excluded_ids = {tm.user_id for tm in team.members} | {viewer.id}
+    excluded_ids |= {inv.target_user_id for inv in pending_invites if inv.target_user_id is not None}
+
+    candidates = (
+        User.query.filter(~User.id.in_(excluded_ids)).order_by(User.name.asc()).all()
+        if excluded_ids
+        else User.query.order_by(User.name.asc()).all()
+    )
+
+    rep_user_ids: set[int] = {viewer.id} | {u.id for u in candidates}
+    rep_score_by_id = _compute_rep_scores_for_user_ids(rep_user_ids)
+    viewer_rep = float(rep_score_by_id.get(viewer.id, 0.0))
+
+    scored = []
+    for u in candidates:
+        score = float(rep_score_by_id.get(u.id, 0.0))
+        scored.append(
+            {
+                "user": u,
+                "reputation": score,
+                "distance": round(abs(score - viewer_rep), 2),
+            }
+        )
+
+    scored.sort(key=lambda x: (x["distance"], (x["user"].name or "").lower()))
+    return scored[:limit]
 
 
 def _send_email(subject: str, to_email: str, body: str):
@@ -186,7 +488,8 @@ def _serialize_user(user):
             keys = ["id", "name", "email", "major", "year", "bio", "contact", "phone"]
             d = {k: getattr(user, k, None) for k in keys}
         try:
-            d["reputation"] = user.reputation()
+            # same roll-up as /api/users/<id>/reputation and /api/graph
+            d["reputation"] = UserReputation.for_user_ids([user.id])[user.id].to_dict()
         except Exception:
             pass
         return d
@@ -194,20 +497,135 @@ def _serialize_user(user):
         return {"id": getattr(user, "id", None), "name": getattr(user, "name", None)}
 
 
+def _lobby_team(lobby_id: int):
+    """Return the lobby's team (the UI assumes one team per lobby)."""
+
+    return db.session.execute(
+        select(Team).where(Team.lobby_id == lobby_id)
+    ).scalars().first()
+
+
+def _is_member(team_id: int, user_id: int) -> bool:
+    """EXISTS check for one membership, without loading team.members."""
+
+    return db.session.query(
+        exists().where(TeamMember.team_id == team_id, TeamMember.user_id == user_id)
+    ).scalar()
+
+
+def _lobby_redirect(lobby_id: int, message: str, category: str = "info"):
+    """Flash one message and send the browser back to the lobby page."""
+
+    flash(message, category)
+    return redirect(url_for("lobby_detail", lobby_id=lobby_id))
+
+
+def _user_by_email(email: str):
+    return db.session.execute(
+        select(User).where(User.email == email)
+    ).scalars().first()
+
+
+def _pending_join_request(lobby_id: int, team_id: int, requester_id: int):
+    return db.session.execute(
+        select(JoinRequest).where(
+            JoinRequest.lobby_id == lobby_id,
+            JoinRequest.team_id == team_id,
+            JoinRequest.requester_id == requester_id,
+            JoinRequest.status == "pending",
+        )
+    ).scalars().first()
+
+
+def _hash_password(password: str) -> str:
+    return generate_password_hash(
+        password, method=app.config["PASSWORD_HASH_METHOD"]
+    )
+
+
+def _json_body() -> dict:
+    """Return the request's JSON object body, or {} when there isn't one.
+
+    Form posts skip the JSON parser entirely; an empty or invalid JSON body
+    parses to {}.
+    """
+
+    if not request.is_json:
+        return {}
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+
+# Listing pages are revalidated with an ETag built from the database's
+# data_version token, which every committed write replaces in the same
+# transaction (see models' commit hooks), so repeat views skip querying and
+# rendering until something changes, whichever process wrote it.
+def _listing_etag() -> str | None:
+    if session.get("_flashes"):
+        # pending flash messages must be rendered (and consumed)
+        return None
+    version = Meta.get(DATA_VERSION_KEY)
+    if version is None:
+        # nothing has been written through the app's sessions yet
+        return None
+    key = f"{version}:{session.get('user_id')}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def etag_cached(view):
+    """Answer `If-None-Match` with 304 while the listing data is unchanged."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = _listing_etag()
+        if etag is not None and request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+        if etag is not None:
+            response.set_etag(etag)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        return response
+
+    return wrapper
+
+
+def readonly(view):
+    """Run a read-only view with autoflush off; there is nothing to flush."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with db.session.no_autoflush:
+            return view(*args, **kwargs)
+
+    return wrapper
+
+
 @app.context_processor
 def inject_current_user():
     return {"current_user": get_current_user()}
 
 
+# index.html only varies with the navbar's current_user and flashed messages,
+# so the anonymous, message-free render is computed once and reused.
+_anonymous_index_html: str | None = None
+
+
 @app.route("/")
+@readonly
 def index():
-    return render_template("index.html")
+    global _anonymous_index_html
+
+    if session.get("user_id") or session.get("_flashes"):
+        return render_template("index.html")
+    if _anonymous_index_html is None:
+        _anonymous_index_html = render_template("index.html")
+    return _anonymous_index_html
 
 
 @app.route("/login", methods=["GET", "POST"])
 def login():
-    from models import User
-
     if request.method == "GET":
         users = User.query.order_by(User.name.asc()).all()
         return render_template("login.html", users=users)
@@ -225,7 +643,7 @@ def login():
             or request.headers.get("X-Requested-With") == "XMLHttpRequest"
         )
         # support JSON or form-encoded POST bodies for API clients (Next.js)
-        json_data = request.get_json(silent=True) or {}
+        json_data = _json_body()
         if json_data:
             email = (json_data.get("email") or "").strip()
             password = json_data.get("password") or ""
@@ -236,7 +654,7 @@ def login():
             flash("Email and password are required.", "warning")
             return render_template("login.html", users=users)
 
-        user = User.query.filter_by(email=email).first()
+        user = _user_by_email(email)
         if not user or not getattr(user, "password_hash", None):
             if accept_json:
                 return jsonify({"error": "invalid_credentials"}), 401
@@ -274,8 +692,6 @@ def logout():
 
 @app.route("/register", methods=["GET", "POST"])
 def register():
-    from models import User
-
     if request.method == "POST":
         name = (request.form.get("name") or "").strip() or "Anonymous"
         email = (request.form.get("email") or "").strip()
@@ -293,7 +709,7 @@ def register():
             flash("Password is required (min 6 characters).", "warning")
             return redirect(url_for("register"))
 
-        existing = User.query.filter_by(email=email).first()
+        existing = _user_by_email(email)
         if existing:
             flash("An account with that email already exists. Please login.", "warning")
             return redirect(url_for("login"))
@@ -306,7 +722,7 @@ def register():
             bio=bio or "",
             contact=contact or "",
             phone=phone or "0",
-            password_hash=generate_password_hash(password),
+            password_hash=_hash_password(password),
         )
         db.session.add(user)
         db.session.commit()
@@ -336,12 +752,14 @@ def me():
 
 
 @app.route("/users")
+@etag_cached
+@readonly
 def users_page():
-    from models import User
-
     users = User.query.order_by(User.name.asc()).all()
-    trust_scores = User.compute_transitive_trust_scores()
-    rep_by_id = {u.id: u.reputation(trust_scores=trust_scores) for u in users}
+    rep_by_id = {
+        user_id: row.to_dict()
+        for user_id, row in UserReputation.for_user_ids(u.id for u in users).items()
+    }
     return render_template("users.html", users=users, rep_by_id=rep_by_id)
 
 
@@ -350,10 +768,14 @@ def graph_page():
     return render_template("graph.html")
 
 
+# profile fields a user may edit on their own page
+ALLOWED_PROFILE_FIELDS = frozenset(
+    {"name", "major", "year", "bio", "contact", "phone", "email"}
+)
+
+
 @app.route("/users/<int:user_id>", methods=["GET", "POST"])
 def user_profile(user_id):
-    from models import User, Lobby, Team, TeamMember, Rating
-
     user = User.query.get_or_404(user_id)
     viewer = get_current_user()
     can_edit = viewer is not None and viewer.id == user.id
@@ -367,8 +789,7 @@ def user_profile(user_id):
         field = (request.form.get("field") or "").strip()
         if field:
             value = (request.form.get("value") or "").strip()
-            allowed = {"name", "major", "year", "bio", "contact", "phone", "email"}
-            if field not in allowed:
+            if field not in ALLOWED_PROFILE_FIELDS:
                 flash("Invalid field.", "danger")
                 return redirect(url_for("user_profile", user_id=user.id))
             if field == "name":
@@ -379,21 +800,10 @@ def user_profile(user_id):
             else:
                 setattr(user, field, value or None)
         else:
-            # Full-form update (legacy)
-            if "name" in request.form:
-                user.name = (request.form.get("name") or user.name).strip() or user.name
-            if "major" in request.form:
-                user.major = (request.form.get("major") or "").strip() or None
-            if "year" in request.form:
-                user.year = (request.form.get("year") or "").strip() or None
-            if "bio" in request.form:
-                user.bio = (request.form.get("bio") or "").strip() or None
-            if "contact" in request.form:
-                user.contact = (request.form.get("contact") or "").strip() or None
-            if "phone" in request.form:
-                user.phone = (request.form.get("phone") or "").strip() or None
-            if "email" in request.form:
-                user.email = (request.form.get("email") or "").strip() or None
+            # Full-form update (legacy); a blank name keeps the current one
+            for key in ALLOWED_PROFILE_FIELDS & request.form.keys():
+                value = request.form[key].strip()
+                setattr(user, key, value or (user.name if key == "name" else None))
 
         db.session.commit()
         flash("Profile updated.", "success")
@@ -411,48 +821,59 @@ def user_profile(user_id):
     history_lobbies = (
         (
             Lobby.query.filter(Lobby.id.in_(ids), Lobby.finished == True)
-            .order_by(Lobby.finished_at.desc().nullslast(), Lobby.created_at.desc())
+            .order_by(
+                Lobby.finished_at.desc().nullslast(),
+                Lobby.created_at.desc(),
+                Lobby.id.desc(),
+            )
             .all()
         )
         if ids
         else []
     )
 
-    for lobby in history_lobbies:
-        # ratings received by this user for this lobby
-        ratings = (
-            db.session.query(Rating)
-            .join(Team, Rating.team_id == Team.id)
-            .filter(Team.lobby_id == lobby.id)
+    # ratings received by this user, aggregated per history lobby in one query
+    stats_by_lobby_id = {}
+    if history_lobbies:
+        rows = (
+            db.session.query(
+                Team.lobby_id,
+                func.count(Rating.id),
+                func.avg(func.coalesce(Rating.contribution, 0)),
+                func.avg(func.coalesce(Rating.communication, 0)),
+                func.avg(case((Rating.would_work_again.is_(True), 1.0), else_=0.0)),
+            )
+            .join(Rating, Rating.team_id == Team.id)
+            .filter(Team.lobby_id.in_([l.id for l in history_lobbies]))
             .filter(Rating.target_user_id == user.id)
+            .group_by(Team.lobby_id)
             .all()
         )
-        if ratings:
-            contribution_avg = round(
-                sum(r.contribution or 0 for r in ratings) / len(ratings), 2
-            )
-            communication_avg = round(
-                sum(r.communication or 0 for r in ratings) / len(ratings), 2
-            )
-            would_work_again_ratio = sum(
-                1 for r in ratings if r.would_work_again
-            ) / len(ratings)
+        stats_by_lobby_id = {row[0]: row[1:] for row in rows}
+
+    for lobby in history_lobbies:
+        stats = stats_by_lobby_id.get(lobby.id)
+        if stats:
+            rating_count, contrib_avg, comm_avg, wwa_ratio = stats
+            contribution_avg = round(contrib_avg, 2)
+            communication_avg = round(comm_avg, 2)
+            would_work_again_ratio = wwa_ratio
         else:
+            rating_count = 0
             contribution_avg = 0
             communication_avg = 0
             would_work_again_ratio = None
         history.append(
             {
                 "lobby": lobby,
-                "rating_count": len(ratings),
+                "rating_count": rating_count,
                 "contribution_avg": contribution_avg,
                 "communication_avg": communication_avg,
                 "would_work_again_ratio": would_work_again_ratio,
             }
         )
 
-    trust_scores = User.compute_transitive_trust_scores()
-    overall_rep = user.reputation(trust_scores=trust_scores)
+    overall_rep = UserReputation.for_user_ids([user.id])[user.id].to_dict()
     return render_template(
         "profile.html",
         user=user,
@@ -463,96 +884,23 @@ def user_profile(user_id):
 
 
 @app.route("/lobbies")
+@etag_cached
+@readonly
 def lobbies_page():
-    from models import Lobby, Team, JoinRequest
-
-    qs = Lobby.query.order_by(Lobby.created_at.desc()).all()
-    lobbies = []
-    viewer = get_current_user()
-
-    pending_by_lobby_id = {}
-    if viewer:
-        pending = JoinRequest.query.filter_by(
-            requester_id=viewer.id, status="pending"
-        ).all()
-        pending_by_lobby_id = {r.lobby_id: r for r in pending}
-
-    # Pre-compute rep scores for users participating in these lobbies (+ viewer).
-    member_ids_by_lobby_id: dict[int, list[int]] = {}
-    all_user_ids: set[int] = set()
-
-    for q in qs:
-        team = Team.query.filter_by(lobby_id=q.id).first()
-        member_ids = [tm.user_id for tm in team.members] if team else []
-        member_ids_by_lobby_id[q.id] = member_ids
-        all_user_ids.update(member_ids)
-
-    if viewer:
-        all_user_ids.add(viewer.id)
-
-    rep_score_by_id = _compute_rep_scores_for_user_ids(all_user_ids)
-    viewer_rep = float(rep_score_by_id.get(viewer.id, 0.0)) if viewer else None
-
-    for idx, q in enumerate(qs):
-        team = Team.query.filter_by(lobby_id=q.id).first()
-        member_ids = member_ids_by_lobby_id.get(q.id, [])
-        participant_count = len(member_ids)
-        d = q.to_dict()
-        d["participant_count"] = participant_count
-        d["team_locked"] = bool(team.locked) if team else False
-
-        role = None
-        if viewer:
-            if q.leader_id and viewer.id == q.leader_id:
-                role = "Leader"
-            elif team and any(tm.user_id == viewer.id for tm in team.members):
-                role = "Member"
-        d["role"] = role
-
-        req = pending_by_lobby_id.get(q.id)
-        d["join_request_status"] = req.status if req else None
-
-        team_rep = _aggregate_team_rep_0_to_10(member_ids, rep_score_by_id)
-        d["team_reputation"] = team_rep
-        if viewer_rep is not None:
-            d["rep_distance"] = round(abs(team_rep - viewer_rep), 2)
-        else:
-            d["rep_distance"] = None
-
-        # preserve original ordering (created_at desc) as a stable tiebreaker
-        d["_order"] = idx
-        lobbies.append(d)
-
-    if viewer:
-        def _is_joinable(l: dict) -> bool:
-            return (
-                l.get("role") is None
-                and (not bool(l.get("finished")))
-                and (not bool(l.get("team_locked")))
-            )
-
-        def _sort_key(l: dict):
-            joinable_bucket = 0 if _is_joinable(l) else 1
-            dist = l.get("rep_distance")
-            dist_val = float(dist) if dist is not None else 1e9
-            return (joinable_bucket, dist_val, l.get("_order", 0))
-
-        lobbies.sort(key=_sort_key)
-
-    for l in lobbies:
-        l.pop("_order", None)
-
+    lobbies = _lobby_listing(get_current_user())
     return render_template("lobbies.html", lobbies=lobbies)
 
 
 @app.route("/lobbies/<int:lobby_id>", methods=["GET", "POST"])
 def lobby_detail(lobby_id):
-    from models import Lobby, Team, User, Rating, JoinRequest
-    from models import Invitation
-
     lobby = Lobby.query.get_or_404(lobby_id)
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
-    leader = User.query.get(lobby.leader_id) if lobby.leader_id else None
+    team = (
+        Team.query.options(selectinload(Team.members).joinedload(TeamMember.user))
+        .filter_by(lobby_id=lobby.id)
+        .first()
+    )
+    # usually a member, in which case this is served from the identity map
+    leader = db.session.get(User, lobby.leader_id) if lobby.leader_id else None
 
     viewer = get_current_user()
     is_leader = (
@@ -563,10 +911,7 @@ def lobby_detail(lobby_id):
 
     members = []
     if team:
-        for tm in team.members:
-            u = User.query.get(tm.user_id)
-            if u:
-                members.append(u)
+        members = [tm.user for tm in team.members if tm.user is not None]
 
     is_member = False
     if viewer and team:
@@ -585,23 +930,27 @@ def lobby_detail(lobby_id):
             .order_by(JoinRequest.created_at.asc())
             .all()
         )
+        requester_ids = {r.requester_id for r in reqs}
+        requesters_by_id = (
+            {u.id: u for u in User.query.filter(User.id.in_(requester_ids)).all()}
+            if requester_ids
+            else {}
+        )
         for r in reqs:
-            join_requests.append({"request": r, "requester": User.query.get(r.requester_id)})
+            join_requests.append(
+                {"request": r, "requester": requesters_by_id.get(r.requester_id)}
+            )
 
     submissions = []
     if team:
-        from models import Submission
-
-        for s in team.submissions:
-            submitter = (
-                User.query.get(s.submitter_id)
-                if getattr(s, "submitter_id", None)
-                else None
-            )
-            submissions.append({"submission": s, "submitter": submitter})
-        submissions.sort(
-            key=lambda x: (x["submission"].created_at or datetime.min), reverse=True
+        # newest first, served in order from ix_submission_team_created
+        rows = (
+            Submission.query.options(joinedload(Submission.submitter))
+            .filter_by(team_id=team.id)
+            .order_by(Submission.created_at.desc().nullslast(), Submission.id)
+            .all()
         )
+        submissions = [{"submission": s, "submitter": s.submitter} for s in rows]
 
     teammates = []
     if viewer:
@@ -609,33 +958,7 @@ def lobby_detail(lobby_id):
 
     invite_recommendations = []
     if viewer and is_leader and team and (not team.locked) and (not lobby.finished):
-        pending_invites = Invitation.query.filter_by(team_id=team.id, status="pending").all()
-        excluded_ids = {tm.user_id for tm in team.members} | {viewer.id}
-        excluded_ids |= {inv.target_user_id for inv in pending_invites if inv.target_user_id is not None}
-
-        candidates = (
-            User.query.filter(~User.id.in_(excluded_ids)).order_by(User.name.asc()).all()
-            if excluded_ids
-            else User.query.order_by(User.name.asc()).all()
-        )
-
-        rep_user_ids: set[int] = {viewer.id} | {u.id for u in candidates}
-        rep_score_by_id = _compute_rep_scores_for_user_ids(rep_user_ids)
-        viewer_rep = float(rep_score_by_id.get(viewer.id, 0.0))
-
-        scored = []
-        for u in candidates:
-            score = float(rep_score_by_id.get(u.id, 0.0))
-            scored.append(
-                {
-                    "user": u,
-                    "reputation": score,
-                    "distance": round(abs(score - viewer_rep), 2),
-                }
-            )
-
-        scored.sort(key=lambda x: (x["distance"], x["user"].name.lower()))
-        invite_recommendations = scored[:5]
+        invite_recommendations = _invite_recommendations(viewer, team)
 
     ratings = []
     rating_by_pair = {}
@@ -643,21 +966,24 @@ def lobby_detail(lobby_id):
     avg_by_target = {}
     if team:
         ratings = Rating.query.filter_by(team_id=team.id).all()
+        # per-target sums and counts, accumulated in a single pass
+        contrib_sum = defaultdict(int)
+        comm_sum = defaultdict(int)
+        count = defaultdict(int)
         for r in ratings:
             rating_by_pair[(r.target_user_id, r.rater_id)] = r
             if viewer and r.rater_id == viewer.id:
                 viewer_ratings_by_target[r.target_user_id] = r
+            contrib_sum[r.target_user_id] += r.contribution or 0
+            comm_sum[r.target_user_id] += r.communication or 0
+            count[r.target_user_id] += 1
         for m in members:
-            rs = [r for r in ratings if r.target_user_id == m.id]
-            if rs:
+            n = count.get(m.id)
+            if n:
                 avg_by_target[m.id] = {
-                    "contribution": round(
-                        sum(r.contribution or 0 for r in rs) / len(rs), 2
-                    ),
-                    "communication": round(
-                        sum(r.communication or 0 for r in rs) / len(rs), 2
-                    ),
-                    "count": len(rs),
+                    "contribution": round(contrib_sum[m.id] / n, 2),
+                    "communication": round(comm_sum[m.id] / n, 2),
+                    "count": n,
                 }
             else:
                 avg_by_target[m.id] = {
@@ -668,42 +994,41 @@ def lobby_detail(lobby_id):
 
     if request.method == "POST":
         if not is_leader:
-            flash("Only the lobby leader can modify lobby details.", "danger")
-            return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+            return _lobby_redirect(
+                lobby.id, "Only the lobby leader can modify lobby details.", "danger"
+            )
 
         action = (request.form.get("action") or "save").strip()
         if action == "lock_team":
             if not team:
-                flash("No team exists for this lobby.", "danger")
-                return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+                return _lobby_redirect(
+                    lobby.id, "No team exists for this lobby.", "danger"
+                )
             team.locked = True
             db.session.commit()
-            flash("Team locked.", "success")
-            return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+            return _lobby_redirect(lobby.id, "Team locked.", "success")
 
         if action == "finish_contest":
             lobby.finished = True
             lobby.finished_at = datetime.utcnow()
             db.session.commit()
-            flash(
+            return _lobby_redirect(
+                lobby.id,
                 "Contest marked as finished. Team members can now submit proof and ratings.",
                 "success",
             )
-            return redirect(url_for("lobby_detail", lobby_id=lobby.id))
 
         # default: save lobby fields
         title = (request.form.get("title") or "").strip()
         contest_link = (request.form.get("contest_link") or "").strip() or None
 
         if not title:
-            flash("Title is required.", "warning")
-            return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+            return _lobby_redirect(lobby.id, "Title is required.", "warning")
 
         lobby.title = title
         lobby.contest_link = contest_link
         db.session.commit()
-        flash("Lobby updated.", "success")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Lobby updated.", "success")
 
     return render_template(
         "lobby_detail.html",
@@ -730,8 +1055,6 @@ def lobby_detail(lobby_id):
     "/lobbies/<int:lobby_id>/submissions/<int:submission_id>/delete", methods=["POST"]
 )
 def delete_proof_page(lobby_id, submission_id):
-    from models import Lobby, Team, Submission
-
     user = get_current_user()
     if not user:
         return redirect(
@@ -739,29 +1062,25 @@ def delete_proof_page(lobby_id, submission_id):
         )
 
     lobby = Lobby.query.get_or_404(lobby_id)
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
-        flash("Team not found for this lobby.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Team not found for this lobby.", "danger")
 
     submission = Submission.query.get_or_404(submission_id)
     if submission.team_id != team.id:
-        flash("Invalid submission.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Invalid submission.", "danger")
     if submission.submitter_id != user.id:
-        flash("You can only delete your own proof.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "You can only delete your own proof.", "danger"
+        )
 
     db.session.delete(submission)
     db.session.commit()
-    flash("Proof deleted.", "secondary")
-    return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    return _lobby_redirect(lobby.id, "Proof deleted.", "secondary")
 
 
 @app.route("/lobbies/<int:lobby_id>/submit", methods=["POST"])
 def submit_proof_page(lobby_id):
-    from models import Lobby, Team, Submission
-
     user = get_current_user()
     if not user:
         return redirect(
@@ -769,38 +1088,34 @@ def submit_proof_page(lobby_id):
         )
 
     lobby = Lobby.query.get_or_404(lobby_id)
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
-        flash("Team not found for this lobby.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Team not found for this lobby.", "danger")
 
     if not lobby.finished:
-        flash(
+        return _lobby_redirect(
+            lobby.id,
             "Proof submission is only available after the contest is finished.",
             "warning",
         )
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
 
-    if not any(tm.user_id == user.id for tm in team.members):
-        flash("Only team members can submit proof.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    if not _is_member(team.id, user.id):
+        return _lobby_redirect(
+            lobby.id, "Only team members can submit proof.", "danger"
+        )
 
     proof = (request.form.get("proof") or "").strip()
     if not proof:
-        flash("Proof link/text is required.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Proof link/text is required.", "warning")
 
     submission = Submission(team_id=team.id, submitter_id=user.id, proof_link=proof)
     db.session.add(submission)
     db.session.commit()
-    flash("Proof submitted.", "success")
-    return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    return _lobby_redirect(lobby.id, "Proof submitted.", "success")
 
 
 @app.route("/lobbies/<int:lobby_id>/rate", methods=["POST"])
 def rate_member_page(lobby_id):
-    from models import Lobby, Team, Rating
-
     user = get_current_user()
     if not user:
         return redirect(
@@ -808,71 +1123,66 @@ def rate_member_page(lobby_id):
         )
 
     lobby = Lobby.query.get_or_404(lobby_id)
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
-        flash("Team not found for this lobby.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Team not found for this lobby.", "danger")
 
     if not lobby.finished:
-        flash("Ratings are only available after the contest is finished.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id,
+            "Ratings are only available after the contest is finished.",
+            "warning",
+        )
 
-    member_ids = {tm.user_id for tm in team.members}
-    if user.id not in member_ids:
-        flash("Only team members can submit ratings.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    if not _is_member(team.id, user.id):
+        return _lobby_redirect(
+            lobby.id, "Only team members can submit ratings.", "danger"
+        )
 
     try:
         target_user_id = int(request.form.get("target_user_id") or 0)
     except Exception:
         target_user_id = 0
-    if target_user_id not in member_ids or target_user_id == user.id:
-        flash("Choose a valid teammate to rate.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    if target_user_id == user.id or not _is_member(team.id, target_user_id):
+        return _lobby_redirect(lobby.id, "Choose a valid teammate to rate.", "warning")
 
     try:
         contribution = int(request.form.get("contribution") or 0)
         communication = int(request.form.get("communication") or 0)
     except Exception:
-        flash("Contribution and communication must be numbers.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "Contribution and communication must be numbers.", "warning"
+        )
 
     would_work_again = request.form.get("would_work_again") == "on"
     comment = (request.form.get("comment") or "").strip() or None
 
-    existing = Rating.query.filter_by(
-        team_id=team.id, rater_id=user.id, target_user_id=target_user_id
-    ).all()
-    if existing:
-        keep = existing[0]
-        keep.contribution = contribution
-        keep.communication = communication
-        keep.would_work_again = would_work_again
-        keep.comment = comment
-        for extra in existing[1:]:
-            db.session.delete(extra)
-        db.session.commit()
-        flash("Rating updated.", "success")
-    else:
-        r = Rating(
-            team_id=team.id,
-            rater_id=user.id,
-            target_user_id=target_user_id,
-            contribution=contribution,
-            communication=communication,
-            would_work_again=would_work_again,
-            comment=comment,
+    # only picks the message; the upsert itself is atomic
+    rated_before = db.session.scalar(
+        select(
+            exists().where(
+                Rating.team_id == team.id,
+                Rating.rater_id == user.id,
+                Rating.target_user_id == target_user_id,
+            )
         )
-        db.session.add(r)
-        db.session.commit()
-        flash("Rating submitted.", "success")
+    )
+    Rating.upsert(
+        team.id,
+        user.id,
+        target_user_id,
+        contribution=contribution,
+        communication=communication,
+        would_work_again=would_work_again,
+        comment=comment,
+    )
+    db.session.commit()
+    flash("Rating updated." if rated_before else "Rating submitted.", "success")
     return redirect(url_for("lobby_detail", lobby_id=lobby.id))
 
 
 @app.route("/lobbies/<int:lobby_id>/ratings/<int:rating_id>/delete", methods=["POST"])
 def delete_rating_page(lobby_id, rating_id):
-    from models import Lobby, Team, Rating
-
     user = get_current_user()
     if not user:
         return redirect(
@@ -880,23 +1190,21 @@ def delete_rating_page(lobby_id, rating_id):
         )
 
     lobby = Lobby.query.get_or_404(lobby_id)
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
-        flash("Team not found for this lobby.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Team not found for this lobby.", "danger")
 
     rating = Rating.query.get_or_404(rating_id)
     if rating.team_id != team.id:
-        flash("Invalid rating.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Invalid rating.", "danger")
     if rating.rater_id != user.id:
-        flash("You can only delete ratings you posted.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "You can only delete ratings you posted.", "danger"
+        )
 
     db.session.delete(rating)
     db.session.commit()
-    flash("Rating deleted.", "secondary")
-    return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    return _lobby_redirect(lobby.id, "Rating deleted.", "secondary")
 
 
 @app.route("/lobbies/new", methods=["GET", "POST"])
@@ -906,8 +1214,6 @@ def create_lobby_page():
         return redirect(url_for("login", next=url_for("create_lobby_page")))
 
     if request.method == "POST":
-        from models import Lobby, Team
-
         title = (request.form.get("title") or "").strip()
         contest_link = (request.form.get("contest_link") or "").strip() or None
 
@@ -917,14 +1223,14 @@ def create_lobby_page():
 
         lobby = Lobby(title=title, contest_link=contest_link, leader_id=user.id)
         db.session.add(lobby)
-        db.session.commit()
+        db.session.flush()  # assigns lobby.id; everything commits together below
 
         team = Team(lobby_id=lobby.id, locked=False)
         db.session.add(team)
-        db.session.commit()
+        db.session.flush()
 
         # creator joins by default
-        team.add_member(user.id)
+        db.session.add(TeamMember(team_id=team.id, user_id=user.id))
         db.session.commit()
 
         flash("Lobby created.", "success")
@@ -935,44 +1241,35 @@ def create_lobby_page():
 
 @app.route("/lobbies/<int:lobby_id>/join-requests", methods=["POST"])
 def create_join_request_page(lobby_id):
-    from models import Lobby, Team, JoinRequest
-
     user = get_current_user()
     if not user:
         return redirect(url_for("login", next=url_for("lobby_detail", lobby_id=lobby_id)))
 
     lobby = Lobby.query.get_or_404(lobby_id)
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
-        flash("Team not found for this lobby.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Team not found for this lobby.", "danger")
 
     if lobby.finished:
-        flash("This contest is finished; joining is disabled.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "This contest is finished; joining is disabled.", "warning"
+        )
     if team.locked:
-        flash("Team is locked; cannot request to join.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "Team is locked; cannot request to join.", "warning"
+        )
 
-    if any(tm.user_id == user.id for tm in team.members):
-        flash("You are already a team member.", "info")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    if _is_member(team.id, user.id):
+        return _lobby_redirect(lobby.id, "You are already a team member.", "info")
 
-    existing = JoinRequest.query.filter_by(
-        lobby_id=lobby.id,
-        team_id=team.id,
-        requester_id=user.id,
-        status="pending",
-    ).first()
+    existing = _pending_join_request(lobby.id, team.id, user.id)
     if existing:
-        flash("Join request already pending.", "info")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Join request already pending.", "info")
 
     jr = JoinRequest(lobby_id=lobby.id, team_id=team.id, requester_id=user.id, status="pending")
     db.session.add(jr)
     db.session.commit()
-    flash("Join request submitted.", "success")
-    return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    return _lobby_redirect(lobby.id, "Join request submitted.", "success")
 
 
 @app.route(
@@ -980,63 +1277,59 @@ def create_join_request_page(lobby_id):
     methods=["POST"],
 )
 def decide_join_request_page(lobby_id, request_id):
-    from models import Lobby, Team, JoinRequest
-
     user = get_current_user()
     if not user:
         return redirect(url_for("login", next=url_for("lobby_detail", lobby_id=lobby_id)))
 
     lobby = Lobby.query.get_or_404(lobby_id)
     if lobby.leader_id != user.id:
-        flash("Only the lobby leader can decide join requests.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "Only the lobby leader can decide join requests.", "danger"
+        )
 
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
-        flash("Team not found for this lobby.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Team not found for this lobby.", "danger")
 
-    jr = JoinRequest.query.get_or_404(request_id)
-    if jr.lobby_id != lobby.id or jr.team_id != team.id:
-        flash("Invalid join request.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    jr = JoinRequest.query.filter_by(
+        id=request_id, lobby_id=lobby.id, team_id=team.id
+    ).first()
+    if not jr:
+        return _lobby_redirect(lobby.id, "Invalid join request.", "danger")
 
     if jr.status != "pending":
-        flash("This join request is no longer pending.", "info")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "This join request is no longer pending.", "info"
+        )
 
     decision = (request.form.get("decision") or "").strip().lower()
     if decision not in {"accept", "reject"}:
-        flash("Invalid decision.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Invalid decision.", "danger")
 
     if lobby.finished or team.locked:
-        flash("Team is not accepting new members.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "Team is not accepting new members.", "warning"
+        )
 
     if decision == "reject":
         jr.status = "rejected"
         db.session.commit()
-        flash("Join request rejected.", "secondary")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Join request rejected.", "secondary")
 
-    if any(tm.user_id == jr.requester_id for tm in team.members):
+    if _is_member(team.id, jr.requester_id):
         jr.status = "accepted"
         db.session.commit()
-        flash("Requester is already a member.", "info")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Requester is already a member.", "info")
 
+    # no-op if a concurrent accept already added them (uq_team_member)
     team.add_member(jr.requester_id)
     jr.status = "accepted"
     db.session.commit()
-    flash("Join request accepted; member added.", "success")
-    return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    return _lobby_redirect(lobby.id, "Join request accepted; member added.", "success")
 
 
 @app.route("/lobbies/<int:lobby_id>/invite", methods=["POST"])
 def invite_to_lobby(lobby_id):
-    from models import Lobby, Team, User, Invitation
-
     user = get_current_user()
     if not user:
         return redirect(
@@ -1045,40 +1338,46 @@ def invite_to_lobby(lobby_id):
 
     lobby = Lobby.query.get_or_404(lobby_id)
     if lobby.leader_id != user.id:
-        flash("Only the lobby leader can invite teammates.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+        return _lobby_redirect(
+            lobby.id, "Only the lobby leader can invite teammates.", "danger"
+        )
+    team = _lobby_team(lobby.id)
     if not team:
-        flash("Team not found for this lobby.", "danger")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Team not found for this lobby.", "danger")
     if lobby.finished:
-        flash("This contest is finished; inviting is disabled.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "This contest is finished; inviting is disabled.", "warning"
+        )
     if team.locked:
-        flash("Team is locked; cannot invite new members.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "Team is locked; cannot invite new members.", "warning"
+        )
 
     email = (request.form.get("target_email") or "").strip()
     if not email:
-        flash("Target email is required.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(lobby.id, "Target email is required.", "warning")
 
-    target = User.query.filter_by(email=email).first()
+    target = _user_by_email(email)
     if not target:
-        flash("No user with that email found. The user must register first.", "warning")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id,
+            "No user with that email found. The user must register first.",
+            "warning",
+        )
 
     # prevent duplicate invite or if already member
-    if any(tm.user_id == target.id for tm in team.members):
-        flash("User is already a member of this team.", "info")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    if _is_member(team.id, target.id):
+        return _lobby_redirect(
+            lobby.id, "User is already a member of this team.", "info"
+        )
 
     existing = Invitation.query.filter_by(
         team_id=team.id, target_user_id=target.id, status="pending"
     ).first()
     if existing:
-        flash("A pending invitation already exists for that user.", "info")
-        return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+        return _lobby_redirect(
+            lobby.id, "A pending invitation already exists for that user.", "info"
+        )
 
     token = secrets.token_urlsafe(24)
     inv = Invitation(
@@ -1098,14 +1397,11 @@ def invite_to_lobby(lobby_id):
     subject = f"Team invite for '{lobby.title}' from {user.name}"
     body = f"{user.name} has requested you join their team for lobby '{lobby.title}'.\n\nAccept: {accept_url}\nReject: {reject_url}\n\nIf you didn't expect this, ignore this email."
     _send_email(subject, target.email, body)
-    flash("Invitation sent (or logged).", "success")
-    return redirect(url_for("lobby_detail", lobby_id=lobby.id))
+    return _lobby_redirect(lobby.id, "Invitation sent (or logged).", "success")
 
 
 @app.route("/invites/respond/<token>")
 def respond_invite(token):
-    from models import Invitation, Team, User
-
     action = (request.args.get("action") or "").lower()
     inv = Invitation.query.filter_by(token=token).first()
     if not inv:
@@ -1113,8 +1409,9 @@ def respond_invite(token):
         return redirect(url_for("index"))
 
     if inv.status != "pending":
-        flash("This invitation has already been responded to.", "info")
-        return redirect(url_for("lobby_detail", lobby_id=inv.lobby_id))
+        return _lobby_redirect(
+            inv.lobby_id, "This invitation has already been responded to.", "info"
+        )
 
     if action == "accept":
         # add target to team
@@ -1149,8 +1446,6 @@ def respond_invite(token):
 
 @app.route("/invites")
 def invites_page():
-    from models import Invitation, Lobby, User
-
     user = get_current_user()
     if not user:
         return redirect(url_for("login", next=url_for("invites_page")))
@@ -1181,8 +1476,6 @@ def invites_page():
 
 @app.route("/join-requests")
 def join_requests_page():
-    from models import JoinRequest, Lobby, User
-
     user = get_current_user()
     if not user:
         return redirect(url_for("login", next=url_for("join_requests_page")))
@@ -1218,10 +1511,8 @@ def join_requests_page():
 
 @app.route("/api/users", methods=["GET", "POST"])
 def users():
-    from models import User
-
     if request.method == "POST":
-        data = request.json or {}
+        data = _json_body()
         name = data.get("name", "Anonymous")
         email = (data.get("email") or "").strip()
         password = data.get("password")
@@ -1233,7 +1524,7 @@ def users():
         if not password:
             return jsonify({"error": "password required"}), 400
         # prevent duplicate emails
-        if User.query.filter_by(email=email).first():
+        if _user_by_email(email):
             return jsonify({"error": "email already exists"}), 400
 
         user = User(
@@ -1241,7 +1532,7 @@ def users():
             major=major,
             year=year,
             email=email,
-            password_hash=generate_password_hash(password),
+            password_hash=_hash_password(password),
         )
         db.session.add(user)
         db.session.commit()
@@ -1251,9 +1542,8 @@ def users():
 
 
 @app.route("/api/users/<int:user_id>", methods=["GET"])
+@readonly
 def get_user(user_id):
-    from models import User
-
     user = User.query.get_or_404(user_id)
     data = user.to_dict()
     data["lobbies"] = user.participated_lobbies()
@@ -1261,119 +1551,47 @@ def get_user(user_id):
 
 
 @app.route("/api/lobbies/<int:lobby_id>", methods=["GET"])
+@readonly
 def get_lobby(lobby_id):
-    from models import Lobby, Team, TeamMember, User
-
     lobby = Lobby.query.get_or_404(lobby_id)
     # gather participants across teams for this lobby
-    teams = Team.query.filter_by(lobby_id=lobby.id).all()
+    teams = (
+        # eager-load the members and users serialized below
+        Team.query.options(selectinload(Team.members).joinedload(TeamMember.user))
+        .filter_by(lobby_id=lobby.id)
+        .all()
+    )
     participants = []
     for t in teams:
         for tm in t.members:
-            u = User.query.get(tm.user_id)
-            if u:
-                participants.append(u.to_dict())
+            if tm.user:
+                participants.append(tm.user.to_dict())
     out = lobby.to_dict()
     out["participants"] = participants
     out["participant_count"] = len(participants)
     # This app's UI assumes a single team per lobby; expose a simple lock flag.
-    primary_team = Team.query.filter_by(lobby_id=lobby.id).first()
+    primary_team = teams[0] if teams else None
     out["team_locked"] = bool(primary_team.locked) if primary_team else False
     return jsonify(out)
 
 
 @app.route("/api/lobbies", methods=["GET", "POST"])
 def lobbies():
-    from models import Lobby, Team, JoinRequest
-
     if request.method == "POST":
-        data = request.json or {}
+        data = _json_body()
         lobby = Lobby(
             title=data.get("title", "Untitled"),
             contest_link=data.get("contest_link"),
             leader_id=data.get("leader_id"),
         )
         db.session.add(lobby)
-        db.session.commit()
+        db.session.flush()
         team = Team(lobby_id=lobby.id, locked=False)
         db.session.add(team)
         db.session.commit()
         return jsonify(lobby.to_dict()), 201
-    viewer = get_current_user()
-
-    # Keep newest-first as the baseline order.
-    qs = Lobby.query.order_by(Lobby.created_at.desc()).all()
-
-    member_ids_by_lobby_id: dict[int, list[int]] = {}
-    all_user_ids: set[int] = set()
-
-    for q in qs:
-        team = Team.query.filter_by(lobby_id=q.id).first()
-        member_ids = [tm.user_id for tm in team.members] if team else []
-        member_ids_by_lobby_id[q.id] = member_ids
-        all_user_ids.update(member_ids)
-
-    if viewer:
-        all_user_ids.add(viewer.id)
-
-    rep_score_by_id = _compute_rep_scores_for_user_ids(all_user_ids)
-    viewer_rep = float(rep_score_by_id.get(viewer.id, 0.0)) if viewer else None
-
-    pending_by_lobby_id = {}
-    if viewer:
-        pending = JoinRequest.query.filter_by(requester_id=viewer.id, status="pending").all()
-        pending_by_lobby_id = {r.lobby_id: r for r in pending}
-
-    out = []
-    for idx, q in enumerate(qs):
-        team = Team.query.filter_by(lobby_id=q.id).first()
-        member_ids = member_ids_by_lobby_id.get(q.id, [])
-
-        d = q.to_dict()
-        d["participant_count"] = len(member_ids)
-        d["team_locked"] = bool(team.locked) if team else False
-
-        role = None
-        if viewer:
-            if q.leader_id and viewer.id == q.leader_id:
-                role = "Leader"
-            elif team and any(tm.user_id == viewer.id for tm in team.members):
-                role = "Member"
-        d["role"] = role
-
-        req = pending_by_lobby_id.get(q.id)
-        d["join_request_status"] = req.status if req else None
-
-        team_rep = _aggregate_team_rep_0_to_10(member_ids, rep_score_by_id)
-        d["team_reputation"] = team_rep
-        if viewer_rep is not None:
-            d["rep_distance"] = round(abs(team_rep - viewer_rep), 2)
-        else:
-            d["rep_distance"] = None
-
-        d["_order"] = idx
-        out.append(d)
-
-    if viewer:
-        def _is_joinable(l: dict) -> bool:
-            return (
-                l.get("role") is None
-                and (not bool(l.get("finished")))
-                and (not bool(l.get("team_locked")))
-            )
-
-        def _sort_key(l: dict):
-            joinable_bucket = 0 if _is_joinable(l) else 1
-            dist = l.get("rep_distance")
-            dist_val = float(dist) if dist is not None else 1e9
-            return (joinable_bucket, dist_val, l.get("_order", 0))
-
-        out.sort(key=_sort_key)
-
-    for l in out:
-        l.pop("_order", None)
-
-    return jsonify(out)
+    with db.session.no_autoflush:
+        return jsonify(_lobby_listing(get_current_user()))
 
 
 @app.route("/api/lobbies/<int:lobby_id>/invite-suggestions", methods=["GET"])
@@ -1383,8 +1601,6 @@ def api_invite_suggestions(lobby_id: int):
     Leader-only, excludes current team members and pending invites.
     """
 
-    from models import Lobby, Team, User, Invitation
-
     viewer = get_current_user()
     if not viewer:
         return jsonify({"error": "not_logged_in"}), 401
@@ -1393,46 +1609,27 @@ def api_invite_suggestions(lobby_id: int):
     if lobby.leader_id != viewer.id:
         return jsonify({"error": "leader_only"}), 403
 
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
         return jsonify({"error": "team_not_found"}), 404
 
     if lobby.finished or team.locked:
         return jsonify([]), 200
 
-    pending_invites = Invitation.query.filter_by(team_id=team.id, status="pending").all()
-    excluded_ids = {tm.user_id for tm in team.members} | {viewer.id}
-    excluded_ids |= {inv.target_user_id for inv in pending_invites if inv.target_user_id is not None}
-
-    candidates = (
-        User.query.filter(~User.id.in_(excluded_ids)).order_by(User.name.asc()).all()
-        if excluded_ids
-        else User.query.order_by(User.name.asc()).all()
-    )
-
-    rep_user_ids: set[int] = {viewer.id} | {u.id for u in candidates}
-    rep_score_by_id = _compute_rep_scores_for_user_ids(rep_user_ids)
-    viewer_rep = float(rep_score_by_id.get(viewer.id, 0.0))
-
-    scored = []
-    for u in candidates:
-        score = float(rep_score_by_id.get(u.id, 0.0))
-        scored.append(
+    return jsonify(
+        [
             {
-                "id": u.id,
-                "name": u.name,
-                "email": u.email,
-                "reputation": score,
-                "distance": round(abs(score - viewer_rep), 2),
+                "id": rec["user"].id,
+                "name": rec["user"].name,
+                "email": rec["user"].email,
+                "reputation": rec["reputation"],
+                "distance": rec["distance"],
             }
-        )
-
-    scored.sort(key=lambda x: (x["distance"], (x["name"] or "").lower()))
-    return jsonify(scored[:5]), 200
+            for rec in _invite_recommendations(viewer, team)
+        ]
+    ), 200
 @app.route("/api/teams/<int:team_id>/lock", methods=["POST"])
 def lock_team(team_id):
-    from models import Team
-
     team = Team.query.get_or_404(team_id)
     team.locked = True
     db.session.commit()
@@ -1441,10 +1638,8 @@ def lock_team(team_id):
 
 @app.route("/api/teams/<int:team_id>/submit", methods=["POST"])
 def submit_team(team_id):
-    from models import Team, Submission, Lobby
-
     team = Team.query.get_or_404(team_id)
-    data = request.json or {}
+    data = _json_body()
     proof = data.get("proof")
     if not proof:
         return jsonify({"error": "proof required"}), 400
@@ -1456,8 +1651,7 @@ def submit_team(team_id):
     submitter_id = data.get("submitter_id")
     if submitter_id is None:
         return jsonify({"error": "submitter_id required"}), 400
-    member_ids = {tm.user_id for tm in team.members}
-    if int(submitter_id) not in member_ids:
+    if not _is_member(team.id, int(submitter_id)):
         return jsonify({"error": "submitter must be a team member"}), 400
     submission = Submission(
         team_id=team.id, submitter_id=int(submitter_id), proof_link=proof
@@ -1469,43 +1663,40 @@ def submit_team(team_id):
 
 @app.route("/api/teams/<int:team_id>/ratings", methods=["POST"])
 def rate_member(team_id):
-    from models import Team, Rating, Lobby
-
     team = Team.query.get_or_404(team_id)
     lobby = Lobby.query.get(team.lobby_id)
     if not lobby or not lobby.finished:
         return jsonify({"error": "contest must be finished before ratings"}), 400
-    data = request.json or {}
-    member_ids = {tm.user_id for tm in team.members}
+    data = _json_body()
     rater_id = data.get("rater_id")
     target_user_id = data.get("target_user_id")
     if rater_id is None or target_user_id is None:
         return jsonify({"error": "rater_id and target_user_id required"}), 400
-    if int(rater_id) not in member_ids or int(target_user_id) not in member_ids:
+    if not (
+        _is_member(team.id, int(rater_id)) and _is_member(team.id, int(target_user_id))
+    ):
         return jsonify({"error": "rater and target must be team members"}), 400
     if int(rater_id) == int(target_user_id):
         return jsonify({"error": "cannot rate yourself"}), 400
-    r = Rating(
-        team_id=team.id,
-        rater_id=int(rater_id),
-        target_user_id=int(target_user_id),
+    # a repeat rating for the same teammate replaces the earlier one
+    r = Rating.upsert(
+        team.id,
+        int(rater_id),
+        int(target_user_id),
         contribution=int(data.get("contribution", 0)),
         communication=int(data.get("communication", 0)),
         would_work_again=bool(data.get("would_work_again", False)),
         comment=data.get("comment"),
     )
-    db.session.add(r)
     db.session.commit()
     return jsonify(r.to_dict()), 201
 
 
 @app.route("/api/users/<int:user_id>/reputation")
+@readonly
 def user_reputation(user_id):
-    from models import User
-
     user = User.query.get_or_404(user_id)
-    trust_scores = User.compute_transitive_trust_scores()
-    return jsonify(user.reputation(trust_scores=trust_scores))
+    return jsonify(UserReputation.for_user_ids([user.id])[user.id].to_dict())
 
 
 @app.route("/api/graph")
@@ -1516,12 +1707,10 @@ def api_graph():
     Edges are rater -> target with an averaged local weight in [0, 1].
     """
 
-    from models import User, Rating, _normalize_0_to_10
-
-    trust_scores = User.compute_transitive_trust_scores()
     users = User.query.order_by(User.id.asc()).all()
-
-    rep_by_id = {u.id: u.reputation(trust_scores=trust_scores) for u in users}
+    rollup_by_id = UserReputation.for_user_ids(u.id for u in users)
+    trust_scores = {user_id: row.trust_score for user_id, row in rollup_by_id.items()}
+    rep_by_id = {user_id: row.to_dict() for user_id, row in rollup_by_id.items()}
 
     # Collapse multiple ratings between the same (rater, target)
     pair_local_sum: dict[tuple[int, int], float] = {}
@@ -1618,14 +1807,12 @@ def api_graph():
 
 @app.route("/api/lobbies/<int:lobby_id>/join-requests", methods=["POST"])
 def api_create_join_request(lobby_id):
-    from models import Lobby, Team, JoinRequest
-
     user = get_current_user()
     if not user:
         return jsonify({"error": "not_logged_in"}), 401
 
     lobby = Lobby.query.get_or_404(lobby_id)
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
         return jsonify({"error": "team_not_found"}), 404
 
@@ -1634,15 +1821,10 @@ def api_create_join_request(lobby_id):
     if team.locked:
         return jsonify({"error": "team_locked"}), 400
 
-    if any(tm.user_id == user.id for tm in team.members):
+    if _is_member(team.id, user.id):
         return jsonify({"error": "already_member"}), 400
 
-    existing = JoinRequest.query.filter_by(
-        lobby_id=lobby.id,
-        team_id=team.id,
-        requester_id=user.id,
-        status="pending",
-    ).first()
+    existing = _pending_join_request(lobby.id, team.id, user.id)
     if existing:
         return jsonify({"error": "already_pending", "request": existing.to_dict()}), 400
 
@@ -1658,8 +1840,6 @@ def api_create_join_request(lobby_id):
 
 @app.route("/api/lobbies/<int:lobby_id>/join-requests", methods=["GET"])
 def api_list_join_requests(lobby_id):
-    from models import Lobby, Team, JoinRequest
-
     user = get_current_user()
     if not user:
         return jsonify({"error": "not_logged_in"}), 401
@@ -1668,7 +1848,7 @@ def api_list_join_requests(lobby_id):
     if lobby.leader_id != user.id:
         return jsonify({"error": "leader_only"}), 403
 
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
         return jsonify({"error": "team_not_found"}), 404
 
@@ -1682,8 +1862,6 @@ def api_list_join_requests(lobby_id):
 
 @app.route("/api/lobbies/<int:lobby_id>/join-requests/<int:request_id>/decision", methods=["POST"])
 def api_decide_join_request(lobby_id, request_id):
-    from models import Lobby, Team, JoinRequest
-
     user = get_current_user()
     if not user:
         return jsonify({"error": "not_logged_in"}), 401
@@ -1692,18 +1870,20 @@ def api_decide_join_request(lobby_id, request_id):
     if lobby.leader_id != user.id:
         return jsonify({"error": "leader_only"}), 403
 
-    team = Team.query.filter_by(lobby_id=lobby.id).first()
+    team = _lobby_team(lobby.id)
     if not team:
         return jsonify({"error": "team_not_found"}), 404
 
-    jr = JoinRequest.query.get_or_404(request_id)
-    if jr.lobby_id != lobby.id or jr.team_id != team.id:
+    jr = JoinRequest.query.filter_by(
+        id=request_id, lobby_id=lobby.id, team_id=team.id
+    ).first()
+    if not jr:
         return jsonify({"error": "invalid_request"}), 400
 
     if jr.status != "pending":
         return jsonify({"error": "not_pending", "request": jr.to_dict()}), 400
 
-    data = request.get_json(silent=True) or {}
+    data = _json_body()
     decision = (data.get("decision") or "").strip().lower()
     if decision not in {"accept", "reject"}:
         return jsonify({"error": "invalid_decision"}), 400
@@ -1718,11 +1898,12 @@ def api_decide_join_request(lobby_id, request_id):
         db.session.commit()
         return jsonify(jr.to_dict()), 200
 
-    if any(tm.user_id == jr.requester_id for tm in team.members):
+    if _is_member(team.id, jr.requester_id):
         jr.status = "accepted"
         db.session.commit()
         return jsonify(jr.to_dict()), 200
 
+    # no-op if a concurrent accept already added them (uq_team_member)
     team.add_member(jr.requester_id)
     jr.status = "accepted"
     db.session.commit()
@@ -1730,5 +1911,12 @@ def api_decide_join_request(lobby_id, request_id):
 
 
 if __name__ == "__main__":
-    # run without the reloader to avoid external shell tool dependencies in some terminals
-    app.run(debug=False)
\ No newline at end of file
+    if os.environ.get("FLASK_ENV") == "production":
+        # Werkzeug's dev server is not meant for real traffic; waitress serves
+        # requests concurrently from a thread pool.
+        from waitress import serve
+
+        serve(app, host="127.0.0.1", port=5000, threads=WSGI_THREADS)
+    else:
+        # run without the reloader to avoid external shell tool dependencies in some terminals
+        app.run(debug=False)
\ No newline at end of file
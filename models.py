@@ -1,4 +1,11 @@
+import itertools
+import secrets
 from datetime import datetime
+
+from sqlalchemy import case, event, func, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
 from extensions import db
 
 
@@ -21,6 +28,191 @@ def _normalize_0_to_10(value) -> float:
     return _clamp01(v / 10.0)
 
 
+# compute_transitive_trust_scores() results keyed by (damping, max_iter, tol)
+_trust_cache: dict[tuple, dict] = {}
+_trust_cache_version = 0
+
+# Ids per `IN (...)` list, well under SQLite's bound-parameter limit.
+_IN_CHUNK_SIZE = 500
+
+# `Meta` keys: a token replaced whenever ratings or the set of users change,
+# and the token the reputation roll-up's trust scores were computed from.
+TRUST_INPUTS_KEY = "trust_inputs"
+TRUST_ROLLUP_KEY = "trust_rollup"
+# `Meta` key replaced by every commit that writes anything (listing ETags).
+DATA_VERSION_KEY = "data_version"
+
+
+# Unique indexes seen in the database. An older one whose duplicate rows
+# haven't been cleaned up (tools/migrate_unique_indexes.py) lacks them, and
+# may gain them while the app runs, so only hits are remembered.
+_present_indexes: set[str] = set()
+
+
+def _has_index(name: str) -> bool:
+    if name not in _present_indexes and db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"),
+        {"name": name},
+    ).first():
+        _present_indexes.add(name)
+    return name in _present_indexes
+
+
+def _chunked(ids):
+    ids = list(ids)
+    for start in range(0, len(ids), _IN_CHUNK_SIZE):
+        yield ids[start:start + _IN_CHUNK_SIZE]
+
+
+def _flush_pending_trust_inputs(session) -> None:
+    """Flush only if unflushed User/Rating changes are pending.
+
+    They must reach the database (and mark the session via the hooks at the
+    bottom of this module) before trust is computed. Read paths usually have
+    nothing pending, and those running under `no_autoflush` stay unflushed.
+    """
+
+    pending = itertools.chain(session.new, session.dirty, session.deleted)
+    if any(isinstance(obj, (User, Rating)) for obj in pending):
+        session.flush()
+
+
+def _clamped_0_to_10_expr(column):
+    """SQL twin of `_normalize_0_to_10`: NULL -> 0, else value / 10 in [0, 1]."""
+
+    return case(
+        (column.is_(None), 0.0),
+        (column <= 0, 0.0),
+        (column >= 10, 1.0),
+        else_=column / 10.0,
+    )
+
+
+def _local_trust_expr():
+    """Per-rating local trust in [0, 1], as used for the trust graph's edges."""
+
+    return (
+        _clamped_0_to_10_expr(Rating.contribution)
+        + _clamped_0_to_10_expr(Rating.communication)
+        + case((Rating.would_work_again.is_(True), 1.0), else_=0.0)
+    ) / 3.0
+
+
+def _rater_summary_columns():
+    """Per-rater aggregates for `_weighted_reputation`, to GROUP BY rater_id.
+
+    Yields `(rater_id, contrib_avg, comm_avg, wwa_ratio, rating_count)`; the
+    averages skip NULL scores (and are NULL if a rater left none), the same
+    way the weighting does.
+    """
+
+    return (
+        Rating.rater_id,
+        func.avg(Rating.contribution),
+        func.avg(Rating.communication),
+        func.avg(case((Rating.would_work_again.is_(True), 1.0), else_=0.0)),
+        func.count(),
+    )
+
+
+def _weighted_reputation(rater_rows, trust_scores: dict) -> dict:
+    """Trust-weighted reputation from a user's received ratings.
+
+    `rater_rows` are the per-rater summaries selected by
+    `_rater_summary_columns()`. Multiple ratings from the same rater are
+    collapsed into a single per-rater summary (averages) so repeats don't
+    gain extra weight.
+    """
+
+    contrib_num = 0.0
+    contrib_den = 0.0
+    comm_num = 0.0
+    comm_den = 0.0
+    wwa_num = 0.0
+    wwa_den = 0.0
+
+    rating_count = 0
+    for rater_id, contrib_avg_r, comm_avg_r, wwa_ratio_r, n in rater_rows:
+        rating_count += n
+        if rater_id is None:
+            continue
+        w = trust_scores.get(rater_id, 0.0)
+        if w <= 0.0:
+            continue
+
+        if contrib_avg_r is not None:
+            contrib_num += w * contrib_avg_r
+            contrib_den += w
+        if comm_avg_r is not None:
+            comm_num += w * comm_avg_r
+            comm_den += w
+
+        wwa_num += w * wwa_ratio_r
+        wwa_den += w
+
+    avg_contrib = (contrib_num / contrib_den) if contrib_den else 0.0
+    avg_comm = (comm_num / comm_den) if comm_den else 0.0
+
+    return {
+        "contribution_avg": round(avg_contrib, 2),
+        "communication_avg": round(avg_comm, 2),
+        "would_work_again_ratio": (wwa_num / wwa_den) if wwa_den else None,
+        "rating_count": rating_count,
+    }
+
+
+def _power_iterate(
+    n: int,
+    indices: list[int],
+    weights: list[float],
+    sources: list[tuple[int, int, int]],
+    dangling: list[int],
+    damping: float,
+    max_iter: int,
+    tol: float,
+) -> list[float]:
+    """Power iteration kernel for `compute_transitive_trust_scores`.
+
+    Works only on the flat CSR lists (weights already normalized and damped)
+    and returns the trust vector normalized to sum to 1.
+    """
+
+    # Personalization / pre-trust vector: uniform.
+    base = 1.0 / n
+    teleport = (1.0 - damping) * base
+    tol_per_user = tol / n
+
+    # Initialize uniformly.
+    t = [base] * n
+
+    for _ in range(max_iter):
+        new_t = [teleport] * n
+
+        dangling_mass = sum(t[i] for i in dangling)
+        if dangling_mass:
+            share = damping * (dangling_mass / n)
+            new_t = [x + share for x in new_t]
+
+        for i, start, end in sources:
+            ti = t[i]
+            if ti == 0.0:
+                continue
+            for k in range(start, end):
+                new_t[indices[k]] += weights[k] * ti
+
+        # L-infinity norm: the largest change of any single user's score,
+        # against tol / n so it is never looser than an L1 bound of tol
+        diff = max(abs(a - b) for a, b in zip(new_t, t))
+        t = new_t
+        if diff < tol_per_user:
+            break
+
+    total = sum(t)
+    if total > 0.0:
+        t = [x / total for x in t]
+    return t
+
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -57,8 +249,8 @@ class User(db.Model):
 
     def participated_lobbies(self):
         # return list of lobbies this user is part of
-        from models import Lobby, TeamMember, Team
-        # query lobbies by joining TeamMember->Team->Lobby
+        # query lobbies by joining TeamMember->Team->Lobby; to_dict() only
+        # reads columns, so no relationships need loading
         lobbies = db.session.query(Lobby).join(Team).join(TeamMember, Team.id == TeamMember.team_id).filter(TeamMember.user_id == self.id).all()
         return [l.to_dict() for l in lobbies]
 
@@ -68,14 +260,28 @@ class User(db.Model):
         damping: float = 0.85,
         max_iter: int = 50,
         tol: float = 1e-10,
+        cached: bool = True,
     ) -> dict:
         """Compute a global trust/weight per user from the rating graph.
 
         This is a PageRank/EigenTrust-style power iteration over a normalized
         rater->target edge matrix derived from `Rating` rows.
+
+        Results are memoized per process until a commit changes ratings or
+        the set of users (see `_invalidate_trust_cache`); pass `cached=False`
+        to also pick up writes made by other processes.
         """
 
-        user_ids = [row[0] for row in db.session.query(User.id).all()]
+        _flush_pending_trust_inputs(db.session)
+        use_cache = cached and not db.session.info.get("trust_dirty")
+        key = (damping, max_iter, tol)
+        if use_cache:
+            hit = _trust_cache.get(key)
+            if hit is not None:
+                return dict(hit)
+        version = _trust_cache_version
+
+        user_ids = db.session.execute(select(User.id)).scalars().all()
         n = len(user_ids)
         if n == 0:
             return {}
@@ -85,88 +291,68 @@ class User(db.Model):
         # NOTE: we collapse multiple ratings between the same (rater, target)
         # into a single averaged edge weight. This prevents simple “spam the
         # same person repeatedly” manipulation from increasing influence.
-        outgoing_by_idx: list[dict[int, float]] = [dict() for _ in range(n)]
-        outgoing_sum: list[float] = [0.0 for _ in range(n)]
-
-        rows = db.session.query(
-            Rating.rater_id,
-            Rating.target_user_id,
-            Rating.contribution,
-            Rating.communication,
-            Rating.would_work_again,
-        ).all()
-
-        pair_sum: dict[tuple[int, int], float] = {}
-        pair_count: dict[tuple[int, int], int] = {}
-
-        for rater_id, target_user_id, contribution, communication, would_work_again in rows:
-            if rater_id is None or target_user_id is None:
-                continue
-            if rater_id == target_user_id:
-                continue
+        # SQL computes each rating's local trust and sums it per pair.
+        local = _local_trust_expr()
+        rows = db.session.execute(
+            select(Rating.rater_id, Rating.target_user_id, func.sum(local), func.count())
+            .where(
+                Rating.rater_id.is_not(None),
+                Rating.target_user_id.is_not(None),
+                Rating.rater_id != Rating.target_user_id,
+                # keep it non-negative so it can be normalized
+                local > 0.0,
+            )
+            .group_by(Rating.rater_id, Rating.target_user_id)
+        )
+
+        # (rater idx, target idx) -> (sum of local trust, rating count)
+        pairs: dict[tuple[int, int], tuple[float, int]] = {}
+        for rater_id, target_user_id, local_sum, count in rows:
             i = idx_by_user_id.get(rater_id)
             j = idx_by_user_id.get(target_user_id)
             if i is None or j is None:
                 continue
-
-            contrib_n = _normalize_0_to_10(contribution)
-            comm_n = _normalize_0_to_10(communication)
-            wwa_n = 1.0 if bool(would_work_again) else 0.0
-
-            # Local trust in [0, 1]. Keep it non-negative so it can be normalized.
-            local = (contrib_n + comm_n + wwa_n) / 3.0
-            if local <= 0.0:
-                continue
-
-            key = (i, j)
-            pair_sum[key] = pair_sum.get(key, 0.0) + local
-            pair_count[key] = pair_count.get(key, 0) + 1
-
-        for (i, j), s in pair_sum.items():
-            c_ij = s / float(pair_count[(i, j)])
-            outgoing_by_idx[i][j] = c_ij
+            pairs[(i, j)] = (local_sum, count)
+
+        # Store the graph in CSR form: rater i's edges are
+        # indices[indptr[i]:indptr[i + 1]] with matching weights, normalized
+        # by i's outgoing sum and pre-multiplied by the damping factor.
+        indptr = [0] * (n + 1)
+        indices: list[int] = []
+        weights: list[float] = []
+        outgoing_sum = [0.0] * n
+        for (i, j), (s, c) in sorted(pairs.items(), key=lambda item: item[0][0]):
+            c_ij = s / c
+            indices.append(j)
+            weights.append(c_ij)
+            indptr[i + 1] += 1
             outgoing_sum[i] += c_ij
+        for i in range(n):
+            indptr[i + 1] += indptr[i]
+
+        # Raters with outgoing edges as (i, start, end) CSR row bounds; the
+        # rest are dangling and their mass is spread uniformly.
+        sources: list[tuple[int, int, int]] = []
+        dangling: list[int] = []
+        for i in range(n):
+            s = outgoing_sum[i]
+            if s <= 0.0:
+                dangling.append(i)
+                continue
+            start, end = indptr[i], indptr[i + 1]
+            for k in range(start, end):
+                weights[k] = damping * (weights[k] / s)
+            sources.append((i, start, end))
 
-        # Personalization / pre-trust vector: uniform.
-        base = 1.0 / n
-        p = [base for _ in range(n)]
-
-        # Initialize uniformly.
-        t = [base for _ in range(n)]
-
-        for _ in range(max_iter):
-            new_t = [(1.0 - damping) * p_j for p_j in p]
-
-            dangling_mass = 0.0
-            for i in range(n):
-                if outgoing_sum[i] <= 0.0:
-                    dangling_mass += t[i]
-
-            if dangling_mass:
-                share = damping * (dangling_mass / n)
-                for j in range(n):
-                    new_t[j] += share
-
-            for i in range(n):
-                s = outgoing_sum[i]
-                if s <= 0.0:
-                    continue
-                ti = t[i]
-                if ti == 0.0:
-                    continue
-                for j, weight in outgoing_by_idx[i].items():
-                    new_t[j] += damping * (weight / s) * ti
-
-            diff = sum(abs(new_t[i] - t[i]) for i in range(n))
-            t = new_t
-            if diff < tol:
-                break
-
-        total = sum(t)
-        if total > 0.0:
-            t = [x / total for x in t]
+        t = _power_iterate(
+            n, indices, weights, sources, dangling, damping, max_iter, tol
+        )
 
-        return {user_ids[i]: float(t[i]) for i in range(n)}
+        scores = dict(zip(user_ids, t))
+        # skip storing if another commit invalidated the cache meanwhile
+        if use_cache and version == _trust_cache_version:
+            _trust_cache[key] = scores
+        return dict(scores)
 
     def reputation(self, *, trust_scores=None):
         """Compute this user's (weighted) reputation.
@@ -176,101 +362,51 @@ class User(db.Model):
         demand from the whole rating graph.
         """
 
-        from sqlalchemy import case, func
+        return User.reputation_bulk([self.id], trust_scores=trust_scores)[self.id]
 
-        if trust_scores is None:
-            trust_scores = User.compute_transitive_trust_scores()
+    @staticmethod
+    def reputation_bulk(user_ids, *, trust_scores=None) -> dict:
+        """Compute reputation for many users with a single grouped ratings query.
 
-        # Collapse multiple ratings from the same rater into a single
-        # per-rater summary (averages). This prevents repeated ratings from the
-        # same account from having outsized impact.
-        ratings = (
-            db.session.query(
-                Rating.rater_id,
-                Rating.contribution,
-                Rating.communication,
-                Rating.would_work_again,
-            )
-            .filter(Rating.target_user_id == self.id)
-            .all()
-        )
+        Returns a dict keyed by user id; users without ratings get a zero
+        result. `reputation()` is the single-user case of this.
+        """
 
-        by_rater: dict[int, dict[str, float]] = {}
-        for rater_id, contribution, communication, would_work_again in ratings:
-            if rater_id is None:
-                continue
-            bucket = by_rater.get(rater_id)
-            if bucket is None:
-                bucket = {
-                    "contrib_sum": 0.0,
-                    "contrib_n": 0.0,
-                    "comm_sum": 0.0,
-                    "comm_n": 0.0,
-                    "wwa_sum": 0.0,
-                    "wwa_n": 0.0,
-                }
-                by_rater[rater_id] = bucket
-
-            if contribution is not None:
-                bucket["contrib_sum"] += float(contribution)
-                bucket["contrib_n"] += 1.0
-            if communication is not None:
-                bucket["comm_sum"] += float(communication)
-                bucket["comm_n"] += 1.0
-            bucket["wwa_sum"] += 1.0 if bool(would_work_again) else 0.0
-            bucket["wwa_n"] += 1.0
-
-        contrib_num = 0.0
-        contrib_den = 0.0
-        comm_num = 0.0
-        comm_den = 0.0
-        wwa_num = 0.0
-        wwa_den = 0.0
-
-        for rater_id, bucket in by_rater.items():
-            w = float(trust_scores.get(rater_id, 0.0))
-            if w <= 0.0:
-                continue
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
 
-            contrib_avg_r = (
-                (bucket["contrib_sum"] / bucket["contrib_n"]) if bucket["contrib_n"] else None
+        rows_by_target: dict[int, list] = {user_id: [] for user_id in user_ids}
+        any_rows = False
+        for chunk in _chunked(user_ids):
+            rows = db.session.execute(
+                select(Rating.target_user_id, *_rater_summary_columns())
+                .where(Rating.target_user_id.in_(chunk))
+                .group_by(Rating.target_user_id, Rating.rater_id)
             )
-            comm_avg_r = (
-                (bucket["comm_sum"] / bucket["comm_n"]) if bucket["comm_n"] else None
-            )
-            wwa_ratio_r = (
-                (bucket["wwa_sum"] / bucket["wwa_n"]) if bucket["wwa_n"] else 0.0
-            )
-
-            if contrib_avg_r is not None:
-                contrib_num += w * float(contrib_avg_r)
-                contrib_den += w
-            if comm_avg_r is not None:
-                comm_num += w * float(comm_avg_r)
-                comm_den += w
-
-            wwa_num += w * float(wwa_ratio_r)
-            wwa_den += w
-
-        avg_contrib = (contrib_num / contrib_den) if contrib_den else 0.0
-        avg_comm = (comm_num / comm_den) if comm_den else 0.0
-
-        total = (
-            db.session.query(func.count(Rating.id))
-            .filter(Rating.target_user_id == self.id)
-            .scalar()
-            or 0
-        )
+            for target_user_id, *rater_row in rows:
+                rows_by_target[target_user_id].append(rater_row)
+                any_rows = True
+
+        # Nobody rated yet (e.g. new users): every result is the zero dict,
+        # so skip the global trust computation entirely.
+        if not any_rows:
+            trust_scores = {}
+        elif trust_scores is None:
+            trust_scores = User.compute_transitive_trust_scores()
 
         return {
-            "contribution_avg": round(float(avg_contrib), 2),
-            "communication_avg": round(float(avg_comm), 2),
-            "would_work_again_ratio": (wwa_num / wwa_den) if wwa_den else None,
-            "rating_count": total,
+            user_id: _weighted_reputation(rater_rows, trust_scores)
+            for user_id, rater_rows in rows_by_target.items()
         }
 
 
 class Lobby(db.Model):
+    __table_args__ = (
+        # finished-history listings on the profile page
+        db.Index('ix_lobby_finished_at', 'finished', 'finished_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     contest_link = db.Column(db.String(500))
@@ -294,7 +430,7 @@ class Lobby(db.Model):
 
 class Team(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    lobby_id = db.Column(db.Integer, db.ForeignKey('lobby.id'))
+    lobby_id = db.Column(db.Integer, db.ForeignKey('lobby.id'), index=True)
     locked = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -302,10 +438,13 @@ class Team(db.Model):
     submissions = db.relationship('Submission', backref='team', cascade='all, delete-orphan')
 
     def add_member(self, user_id):
-        if any(tm.user_id == user_id for tm in self.members):
-            return
-        tm = TeamMember(team_id=self.id, user_id=user_id)
-        db.session.add(tm)
+        # uq_team_member turns a repeat into a no-op, so there's no need to
+        # load and scan self.members first
+        db.session.execute(
+            sqlite_insert(TeamMember)
+            .values(team_id=self.id, user_id=user_id)
+            .on_conflict_do_nothing()
+        )
 
     def to_dict(self):
         return {
@@ -318,18 +457,31 @@ class Team(db.Model):
 
 
 class TeamMember(db.Model):
+    __table_args__ = (
+        # one membership per user and team; also serves team_id lookups
+        db.Index('uq_team_member', 'team_id', 'user_id', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     team_id = db.Column(db.Integer, db.ForeignKey('team.id'))
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
+
+    user = db.relationship('User')
 
 
 class Submission(db.Model):
+    __table_args__ = (
+        db.Index('ix_submission_team_created', 'team_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    team_id = db.Column(db.Integer, db.ForeignKey('team.id'))
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), index=True)
     submitter_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     proof_link = db.Column(db.String(1000))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    submitter = db.relationship('User', foreign_keys=[submitter_id])
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -341,6 +493,27 @@ class Submission(db.Model):
 
 
 class Rating(db.Model):
+    __table_args__ = (
+        db.Index('ix_rating_team_target', 'team_id', 'target_user_id'),
+        # one rating per rater, target and team; repeats update it (upsert)
+        db.Index(
+            'uq_rating_team_rater_target',
+            'team_id',
+            'rater_id',
+            'target_user_id',
+            unique=True,
+        ),
+        # covers the per-target, per-rater reputation aggregate (no table reads)
+        db.Index(
+            'ix_rating_target_covering',
+            'target_user_id',
+            'rater_id',
+            'contribution',
+            'communication',
+            'would_work_again',
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     team_id = db.Column(db.Integer, db.ForeignKey('team.id'))
     rater_id = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -351,6 +524,38 @@ class Rating(db.Model):
     comment = db.Column(db.String(1000))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    @staticmethod
+    def upsert(team_id, rater_id, target_user_id, **scores):
+        """Insert a rating, or overwrite the rater's existing one for this
+        target in this team, in one atomic statement; returns the row.
+
+        `scores` are the remaining columns (contribution, communication,
+        would_work_again, comment).
+        """
+
+        key = dict(team_id=team_id, rater_id=rater_id, target_user_id=target_user_id)
+        stmt = sqlite_insert(Rating).values(**key, **scores)
+        if _has_index('uq_rating_team_rater_target'):
+            rating = db.session.scalars(
+                stmt.on_conflict_do_update(
+                    index_elements=list(key),
+                    set_=scores,
+                ).returning(Rating),
+                execution_options={'populate_existing': True},
+            ).one()
+        else:
+            # ON CONFLICT needs the unique index, which a database holding
+            # duplicate ratings doesn't have yet: update them, or insert
+            rating = db.session.scalars(
+                update(Rating).filter_by(**key).values(**scores).returning(Rating),
+                execution_options={'populate_existing': True},
+            ).first()
+            if rating is None:
+                rating = db.session.scalars(stmt.returning(Rating)).one()
+        # statements aren't tracked like flushed objects
+        UserReputation.mark_dirty([target_user_id])
+        return rating
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -364,6 +569,195 @@ class Rating(db.Model):
         }
 
 
+class UserReputation(db.Model):
+    """Materialized `User.reputation()` and trust score, one row per user.
+
+    Rating writes recompute only their targets' rows, weighting raters by the
+    trust scores stored here, and mark trust stale (see `Meta`). Trust is
+    global, so `refresh_all()` recomputes it and every row; the app runs that
+    periodically while `is_stale()`.
+    """
+
+    __tablename__ = "user_reputation"
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    contribution_avg = db.Column(db.Float, nullable=False, default=0.0)
+    communication_avg = db.Column(db.Float, nullable=False, default=0.0)
+    would_work_again_ratio = db.Column(db.Float)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    trust_score = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        # same shape as User.reputation()
+        return {
+            'contribution_avg': self.contribution_avg,
+            'communication_avg': self.communication_avg,
+            'would_work_again_ratio': self.would_work_again_ratio,
+            'rating_count': self.rating_count,
+        }
+
+    @staticmethod
+    def empty(user_id):
+        """Unsaved all-zero row for a user the roll-up hasn't covered yet."""
+
+        return UserReputation(
+            user_id=user_id,
+            contribution_avg=0.0,
+            communication_avg=0.0,
+            would_work_again_ratio=None,
+            rating_count=0,
+            trust_score=0.0,
+        )
+
+    @staticmethod
+    def is_stale() -> bool:
+        rollup = Meta.get(TRUST_ROLLUP_KEY)
+        return rollup is None or rollup != Meta.get(TRUST_INPUTS_KEY)
+
+    @staticmethod
+    def refresh_all() -> dict:
+        """Recompute trust and every user's row (caller commits).
+
+        Returns the rep dicts. Writes committed while this runs leave the
+        roll-up stale again, so the next periodic refresh picks them up.
+        """
+
+        inputs = Meta.get(TRUST_INPUTS_KEY) or Meta.bump(TRUST_INPUTS_KEY)
+        trust_scores = User.compute_transitive_trust_scores(cached=False)
+        user_ids = db.session.execute(select(User.id)).scalars().all()
+        rep_by_id = User.reputation_bulk(user_ids, trust_scores=trust_scores)
+        now = datetime.utcnow()
+        db.session.query(UserReputation).delete(synchronize_session=False)
+        if rep_by_id:
+            db.session.execute(
+                db.insert(UserReputation),
+                [
+                    {
+                        'user_id': user_id,
+                        **rep,
+                        'trust_score': trust_scores.get(user_id, 0.0),
+                        'updated_at': now,
+                    }
+                    for user_id, rep in rep_by_id.items()
+                ],
+            )
+        Meta.put(TRUST_ROLLUP_KEY, inputs)
+        return rep_by_id
+
+    @staticmethod
+    def refresh_users(user_ids) -> None:
+        """Recompute just these users' rows with the stored trust scores.
+
+        Their own trust scores are left for `refresh_all()`; rows of users
+        that no longer exist are removed. Caller commits.
+        """
+
+        user_ids = set(user_ids)
+        existing = set()
+        for chunk in _chunked(user_ids):
+            existing.update(
+                db.session.execute(select(User.id).where(User.id.in_(chunk))).scalars()
+            )
+        for chunk in _chunked(user_ids - existing):
+            db.session.execute(
+                db.delete(UserReputation).where(UserReputation.user_id.in_(chunk))
+            )
+        if not existing:
+            return
+
+        trust_scores = {}
+        for chunk in _chunked(existing):
+            raters = select(Rating.rater_id).where(Rating.target_user_id.in_(chunk))
+            trust_scores.update(
+                db.session.execute(
+                    select(UserReputation.user_id, UserReputation.trust_score).where(
+                        UserReputation.user_id.in_(raters)
+                    )
+                ).all()
+            )
+        rep_by_id = User.reputation_bulk(existing, trust_scores=trust_scores)
+
+        now = datetime.utcnow()
+        stmt = sqlite_insert(UserReputation)
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserReputation.user_id],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in (
+                        'contribution_avg',
+                        'communication_avg',
+                        'would_work_again_ratio',
+                        'rating_count',
+                        'updated_at',
+                    )
+                },
+            ),
+            [
+                {'user_id': user_id, **rep, 'updated_at': now}
+                for user_id, rep in rep_by_id.items()
+            ],
+        )
+
+    @staticmethod
+    def for_user_ids(user_ids) -> dict:
+        """Rows keyed by user id; users without a row get `empty()` ones.
+
+        Read-only: missing rows are filled in by the next refresh.
+        """
+
+        user_ids = set(user_ids)
+        rows = {}
+        for chunk in _chunked(user_ids):
+            rows.update(
+                (row.user_id, row)
+                for row in UserReputation.query.filter(UserReputation.user_id.in_(chunk))
+            )
+        for user_id in user_ids - rows.keys():
+            rows[user_id] = UserReputation.empty(user_id)
+        return rows
+
+    @staticmethod
+    def mark_dirty(user_ids) -> None:
+        """Have the current transaction recompute these users' rows on commit.
+
+        Flushed ORM changes are tracked automatically; bulk statements that
+        touch ratings call this for the targets they wrote.
+        """
+
+        db.session.info.setdefault("reputation_dirty_ids", set()).update(user_ids)
+
+
+class Meta(db.Model):
+    """Database-wide key/value markers, shared by every process."""
+
+    __tablename__ = "meta"
+
+    key = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.String(50))
+
+    @staticmethod
+    def get(key):
+        return db.session.execute(select(Meta.value).where(Meta.key == key)).scalar()
+
+    @staticmethod
+    def put(key, value) -> None:
+        db.session.execute(
+            sqlite_insert(Meta)
+            .values(key=key, value=value)
+            .on_conflict_do_update(index_elements=[Meta.key], set_={'value': value})
+        )
+
+    @staticmethod
+    def bump(key) -> str:
+        """Replace `key` with a fresh random token (caller commits)."""
+
+        token = secrets.token_hex(8)
+        Meta.put(key, token)
+        return token
+
+
 class Invitation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     lobby_id = db.Column(db.Integer, db.ForeignKey('lobby.id'))
@@ -412,4 +806,76 @@ class JoinRequest(db.Model):
             "status": self.status,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
-        }
\ No newline at end of file
+        }
+
+
+# Trust depends on every rating and on the number of users. Sessions that
+# write either are marked here; on commit they recompute the affected users'
+# roll-up rows, mark the stored trust stale and drop this process's trust
+# cache. Any write at all also replaces the data_version token.
+@event.listens_for(Session, "after_flush")
+def _mark_trust_inputs_flushed(session, flush_context):
+    session.info["data_written"] = True
+    user_ids = set()
+    for obj in itertools.chain(session.new, session.deleted):
+        if isinstance(obj, User):
+            user_ids.add(obj.id)
+        elif isinstance(obj, Rating):
+            user_ids.add(obj.target_user_id)
+    for obj in session.dirty:
+        if isinstance(obj, Rating):
+            user_ids.add(obj.target_user_id)
+    if user_ids:
+        session.info["trust_dirty"] = True
+        user_ids.discard(None)
+        session.info.setdefault("reputation_dirty_ids", set()).update(user_ids)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_trust_inputs_bulk_written(orm_execute_state):
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        table = mapper.local_table
+    else:
+        # Core statements such as Rating.__table__.insert() carry no mapper
+        table = getattr(orm_execute_state.statement, "table", None)
+    if table is not Meta.__table__:
+        orm_execute_state.session.info["data_written"] = True
+    if table is User.__table__ or table is Rating.__table__:
+        if orm_execute_state.is_update and table is User.__table__:
+            return  # profile columns; the user set is unchanged
+        orm_execute_state.session.info["trust_dirty"] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_reputation_on_commit(session):
+    session.flush()
+    user_ids = session.info.pop("reputation_dirty_ids", None)
+    if user_ids:
+        UserReputation.refresh_users(user_ids)
+    if session.info.get("trust_dirty"):
+        Meta.bump(TRUST_INPUTS_KEY)
+    if session.info.pop("data_written", False):
+        Meta.bump(DATA_VERSION_KEY)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_trust_cache(session):
+    global _trust_cache_version
+    session.info.pop("data_written", None)
+    if session.info.pop("trust_dirty", False):
+        _trust_cache_version += 1
+        _trust_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_trust_dirty(session):
+    session.info.pop("trust_dirty", None)
+    session.info.pop("reputation_dirty_ids", None)
+    session.info.pop("data_written", None)
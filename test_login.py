@@ -4,7 +4,10 @@ import sys
 
 API_BASE = 'http://localhost:5000'
 
+# one Session keeps a single keep-alive connection (and the login cookie)
+# across every call below; all of them expect JSON back
 s = requests.Session()
+s.headers["Accept"] = "application/json"
 
 email = f"testuser{random.randint(1000,9999)}@duke.edu"
 password = "password123"
@@ -23,9 +26,8 @@ if resp.status_code not in (200, 201):
     sys.exit(2)
 
 # Try logging in with JSON
-headers = {"Accept": "application/json"}
 print('\nLogging in via JSON to /login')
-resp = s.post(f"{API_BASE}/login", json={"email": email, "password": password}, headers=headers)
+resp = s.post(f"{API_BASE}/login", json={"email": email, "password": password})
 print('Login status:', resp.status_code)
 try:
     print('Login response:', resp.json())
@@ -34,7 +36,7 @@ except Exception:
 
 # Fetch /me
 print('\nFetching /me')
-resp = s.get(f"{API_BASE}/me", headers=headers)
+resp = s.get(f"{API_BASE}/me")
 print('/me status:', resp.status_code)
 try:
     print('/me json:', resp.json())
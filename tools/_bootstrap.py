@@ -0,0 +1,27 @@
+import functools
+import os
+import sys
+from pathlib import Path
+
+# Prevent app auto-seeding from running during tool runs.
+os.environ.setdefault("TRS_DISABLE_AUTOSEED", "1")
+
+# Ensure repo root is on sys.path (so `import app` works when executing from tools/).
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+
+@functools.cache
+def get_app():
+    # importing app builds the whole Flask/SQLAlchemy stack; defer it until
+    # a tool actually needs it
+    from app import app
+
+    return app
+
+
+@functools.cache
+def get_client():
+    # one client per process, so repeated probes share its cookie jar
+    return get_app().test_client()
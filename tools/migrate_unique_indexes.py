@@ -0,0 +1,53 @@
+"""Delete duplicate rows that block the app's unique indexes, then add them.
+
+Older databases may hold repeated rows (e.g. the same user twice in a team,
+or one rater's two ratings of a teammate);
+the app skips creating such an index at startup until this has been run.
+"""
+
+import argparse
+
+from _bootstrap import get_app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only report how many duplicate rows would be deleted",
+    )
+    args = parser.parse_args()
+
+    app = get_app()
+    from sqlalchemy import delete, func, select
+    from extensions import db
+    from models import Rating, TeamMember
+
+    # model, columns that must be unique, aggregate picking the row to keep
+    targets = [
+        (TeamMember, ("team_id", "user_id"), func.min),  # earliest membership
+        # latest rating, the one a rating form re-submit would have updated
+        (Rating, ("team_id", "rater_id", "target_user_id"), func.max),
+    ]
+
+    with app.app_context():
+        for model, columns, keep in targets:
+            table = model.__table__
+            keep_ids = select(keep(table.c.id)).group_by(*(table.c[c] for c in columns))
+            duplicates = db.session.execute(
+                select(func.count()).select_from(table).where(table.c.id.not_in(keep_ids))
+            ).scalar()
+            print(f"{table.name}: {duplicates} duplicate row(s) on {', '.join(columns)}")
+            if args.dry_run:
+                continue
+            if duplicates:
+                db.session.execute(delete(table).where(table.c.id.not_in(keep_ids)))
+                db.session.commit()
+                print(f"{table.name}: deleted {duplicates} row(s)")
+            for index in table.indexes:
+                index.create(db.engine, checkfirst=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,30 @@
-import os
-import sys
-from pathlib import Path
+import argparse
 
-# Avoid auto-seeding side effects during tool runs
-os.environ.setdefault("TRS_DISABLE_AUTOSEED", "1")
+from _bootstrap import get_client
 
-REPO_ROOT = Path(__file__).resolve().parents[1]
-sys.path.insert(0, str(REPO_ROOT))
 
-from app import app  # noqa: E402
+def _parse_args():
+    # parsed before the app is imported, so --help stays cheap
+    parser = argparse.ArgumentParser(
+        description="Fetch /graph and /api/graph and summarize the trust graph."
+    )
+    parser.add_argument(
+        "--reseed",
+        action="store_true",
+        help="restore the seeded snapshot (seed_db.py --snapshot) first",
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
-    c = app.test_client()
+    args = _parse_args()
+    if args.reseed:
+        # start from the cached seed instead of whatever is in teamrank.db
+        import seed_db
+
+        seed_db.main(["--snapshot"])
+
+    c = get_client()
 
     page = c.get("/graph")
     print("/graph", page.status_code)
@@ -1,60 +1,88 @@
-import os
-import sys
-from pathlib import Path
+import argparse
+from collections import namedtuple
 
-# Prevent app auto-seeding from running during this script.
-os.environ["TRS_DISABLE_AUTOSEED"] = "1"
+from _bootstrap import get_app
 
-# Ensure repo root is on sys.path (so `import app` works when executing from tools/).
-REPO_ROOT = Path(__file__).resolve().parents[1]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
 
-from app import app  # noqa: E402
-from extensions import db  # noqa: E402
-from models import User, Rating  # noqa: E402
+CoreFields = namedtuple(
+    "CoreFields", "contribution_avg communication_avg would_work_again_ratio"
+)
 
 
-def _core_fields(rep: dict) -> dict:
-    return {
-        "contribution_avg": rep.get("contribution_avg"),
-        "communication_avg": rep.get("communication_avg"),
-        "would_work_again_ratio": rep.get("would_work_again_ratio"),
-    }
+def _core_fields(rep: dict) -> CoreFields:
+    return CoreFields(*(rep.get(field) for field in CoreFields._fields))
+
+
+def _check_api(view, user_id: int, live: CoreFields, label: str) -> None:
+    """Compare the reputation endpoint (served from the roll-up) with `live`."""
+
+    # call the view directly; no need to round-trip through WSGI
+    resp = view(user_id)
+    if resp.status_code != 200:
+        raise SystemExit(f"API call failed: {resp.status_code} {resp.data!r}")
+    api = _core_fields(resp.get_json() or {})
+    if api != live:
+        print(f"WARNING: API core fields differ from live computation ({label})")
+        print("live:", live)
+        print("api :", api)
+    else:
+        print(f"API_OK: endpoint matches live computation ({label})")
+
+
+
+def _parse_args():
+    # parsed before the app is imported, so --help stays cheap
+    parser = argparse.ArgumentParser(
+        description="Check that a repeat rating leaves weighted reputation "
+        "unchanged and that the reputation endpoint matches a live computation."
+    )
+    parser.add_argument(
+        "--reseed",
+        action="store_true",
+        help="restore the seeded snapshot (seed_db.py --snapshot) first",
+    )
+    return parser.parse_args()
 
 
 def main() -> None:
+    args = _parse_args()
+    if args.reseed:
+        # start from the cached seed instead of whatever is in teamrank.db
+        import seed_db
+
+        seed_db.main(["--snapshot"])
+
+    app = get_app()
+    from app import user_reputation
+    from extensions import db
+    from models import User, Rating, Team
+
     with app.app_context():
-        trust = User.compute_transitive_trust_scores()
+        # computed from scratch, so a stale roll-up shows up as a mismatch
+        trust = User.compute_transitive_trust_scores(cached=False)
 
         some_rating = Rating.query.first()
         if some_rating is None:
             raise SystemExit("No ratings found in DB. Run seed_db.py first.")
 
-        target = User.query.get(some_rating.target_user_id)
+        target = db.session.get(User, some_rating.target_user_id)
         if target is None:
             raise SystemExit("Target user not found.")
 
         rater_id = some_rating.rater_id
 
-        rep_before = target.reputation(trust_scores=trust)
+        rep_before = User.reputation_bulk([target.id], trust_scores=trust)[target.id]
         core_before = _core_fields(rep_before)
-
-        client = app.test_client()
-        resp = client.get(f"/api/users/{target.id}/reputation")
-        if resp.status_code != 200:
-            raise SystemExit(f"API call failed: {resp.status_code} {resp.data!r}")
-        api_before = resp.get_json() or {}
-        api_core_before = _core_fields(api_before)
-        if api_core_before != core_before:
-            print("WARNING: API core fields differ from model output")
-            print("model:", core_before)
-            print("api  :", api_core_before)
-        else:
-            print("API_OK: endpoint matches model output")
-
+        _check_api(user_reputation, target.id, core_before, "before write")
+
+        # A rater rates a teammate once per team (uq_rating_team_rater_target),
+        # so repeat the rating from a scratch team in the same lobby.
+        team = db.session.get(Team, some_rating.team_id)
+        scratch_team = Team(lobby_id=team.lobby_id if team else None, locked=True)
+        db.session.add(scratch_team)
+        db.session.flush()
         dup = Rating(
-            team_id=some_rating.team_id,
+            team_id=scratch_team.id,
             rater_id=rater_id,
             target_user_id=some_rating.target_user_id,
             contribution=some_rating.contribution,
@@ -65,9 +93,11 @@ def main() -> None:
         db.session.add(dup)
         db.session.commit()
 
-        trust2 = User.compute_transitive_trust_scores()
-        rep_after = target.reputation(trust_scores=trust2)
+        trust2 = User.compute_transitive_trust_scores(cached=False)
+        rep_after = User.reputation_bulk([target.id], trust_scores=trust2)[target.id]
         core_after = _core_fields(rep_after)
+        # the commit should have refreshed the target's roll-up row
+        _check_api(user_reputation, target.id, core_after, "after write")
 
         print("target:", target.id, target.name)
         print("before:", core_before, "rating_count=", rep_before.get("rating_count"))
@@ -85,6 +115,7 @@ def main() -> None:
             print("DEDUP_FAILED: weighted fields changed after exact duplicate")
 
         db.session.delete(dup)
+        db.session.delete(scratch_team)
         db.session.commit()
 
 